@@ -1,35 +1,133 @@
+from collections import Counter
+
+import numpy as np
 import pandas as pd
 
-df = pd.read_csv('resilient_efleets/output/simulation_log.csv')
+LOG_PATH = 'resilient_efleets/output/simulation_log.csv'
+CHUNK_ROWS = 1_000_000
+
+# Only the columns below are used; skip parsing the rest of the log
+LOG_COLUMNS = ['sim_time', 'bus_id', 'status', 'soc', 'current_route', 'latitude', 'longitude']
+
+# Low-cardinality string columns as categoricals: comparisons and counts work on integer codes
+LOG_DTYPES = {'status': 'category', 'current_route': 'category', 'bus_id': 'category'}
+
+
+def iter_log_chunks(path):
+    """Yield the log as DataFrame chunks so memory stays bounded by the chunk size."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        yield from pd.read_csv(path, usecols=LOG_COLUMNS, dtype=LOG_DTYPES, chunksize=CHUNK_ROWS)
+        return
+
+    # Streaming multithreaded Arrow reader; types pinned so later blocks match the first
+    string_cols = ['sim_time', 'bus_id', 'status', 'current_route']
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=64 << 20),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=LOG_COLUMNS,
+            column_types={**{c: pa.string() for c in string_cols},
+                          **{c: pa.float64() for c in ['soc', 'latitude', 'longitude']}},
+            null_values=['', 'None', 'NaN', 'nan', 'NA', 'N/A', 'null', 'NULL'],
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas().astype(LOG_DTYPES)
+
+
+def describe_from_counts(value_counts: pd.Series, name: str) -> pd.Series:
+    """Series.describe() equivalent computed from a value -> count table."""
+    value_counts = value_counts.sort_index()
+    values = value_counts.index.to_numpy(dtype=float)
+    counts = value_counts.to_numpy(dtype=float)
+    n = counts.sum()
+    if n == 0:
+        return pd.Series({'count': 0.0}, name=name)
+    mean = (values * counts).sum() / n
+    std = np.sqrt(((values - mean) ** 2 * counts).sum() / (n - 1)) if n > 1 else np.nan
+    # Linear-interpolated quantiles over the (implicitly expanded) sorted values
+    last_pos = np.cumsum(counts) - 1
+
+    def quantile(q):
+        pos = q * (n - 1)
+        lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+        v_lo = values[np.searchsorted(last_pos, lo)]
+        v_hi = values[np.searchsorted(last_pos, hi)]
+        return v_lo + (v_hi - v_lo) * (pos - lo)
+
+    return pd.Series({
+        'count': n, 'mean': mean, 'std': std, 'min': values[0],
+        '25%': quantile(0.25), '50%': quantile(0.5), '75%': quantile(0.75), 'max': values[-1],
+    }, name=name)
+
+
+# Streaming aggregation: every statistic below is a reduction merged chunk by chunk
+total_rows = 0
+sim_times = set()
+first_times = {}  # first 10 sim_times in order of appearance
+bus_ids = set()
+status_counts = Counter()
+routes_seen = {}  # ordered set of routes
+on_route_rows = 0
+soc_counts = Counter()  # soc is logged rounded to 2 decimals, so this stays small
+depot_counts = Counter()
+timeline_counts = Counter()
+
+for chunk in iter_log_chunks(LOG_PATH):
+    total_rows += len(chunk)
+    chunk_times = chunk['sim_time'].dropna().unique()
+    sim_times.update(chunk_times)
+    for time in chunk_times:
+        if len(first_times) >= 10:
+            break
+        first_times.setdefault(time, None)
+    bus_ids.update(chunk['bus_id'].dropna().unique())
+    status_counts.update(chunk['status'].value_counts().to_dict())
+    routes_seen.update(dict.fromkeys(chunk['current_route'].dropna().unique()))
+    on_route_rows += int((chunk['status'] == 'on_route').sum())
+    soc_counts.update(chunk['soc'].value_counts().to_dict())
+    depot_counts.update(chunk.groupby(['latitude', 'longitude']).size().to_dict())
+    in_first = chunk[chunk['sim_time'].isin(list(first_times))]
+    timeline_counts.update(in_first.groupby(['sim_time', 'status'], observed=True).size().to_dict())
 
-print(f'Total rows: {len(df)}')
-print(f'Time steps: {df["sim_time"].nunique()}')
-print(f'Buses: {df["bus_id"].nunique()}')
-print(f'Duration: {df["sim_time"].min()} to {df["sim_time"].max()}')
+print(f'Total rows: {total_rows}')
+print(f'Time steps: {len(sim_times)}')
+print(f'Buses: {len(bus_ids)}')
+print(f'Duration: {min(sim_times)} to {max(sim_times)}')
 
 print(f'\n{"="*60}')
 print('STATUS DISTRIBUTION:')
-print(df['status'].value_counts())
+print(pd.Series(status_counts, name='count').rename_axis('status').sort_values(ascending=False))
 
 print(f'\n{"="*60}')
 print('SOC STATISTICS:')
-print(df['soc'].describe())
+print(describe_from_counts(pd.Series(soc_counts, dtype=float), 'soc'))
 
 print(f'\n{"="*60}')
 print('ROUTE ACTIVITY:')
-print(f'Unique routes: {df["current_route"].nunique()}')
-print(f'Buses on route entries: {len(df[df["status"]=="on_route"])}')
-print(f'Routes used: {df[df["current_route"].notna()]["current_route"].unique()}')
+print(f'Unique routes: {len(routes_seen)}')
+print(f'Buses on route entries: {on_route_rows}')
+print(f'Routes used: {list(routes_seen)}')
 
 print(f'\n{"="*60}')
 print('DEPOT DISTRIBUTION:')
-depot_coords = df.groupby(['latitude', 'longitude']).size().reset_index(name='count')
+depot_coords = (
+    pd.Series(depot_counts, dtype=int).rename_axis(['latitude', 'longitude']).sort_index().reset_index(name='count')
+    if depot_counts else pd.DataFrame(columns=['latitude', 'longitude', 'count'])
+)
 print(depot_coords.head(10))
 
 print(f'\n{"="*60}')
 print('SAMPLE TIMELINE (first few unique times):')
-for time in df['sim_time'].unique()[:10]:
-    step_df = df[df['sim_time'] == time]
-    on_route = len(step_df[step_df['status'] == 'on_route'])
-    in_depot = len(step_df[step_df['status'] == 'in_depot'])
+# sim_time x status counts for the first times only, accumulated across chunks
+timeline = (
+    pd.Series(timeline_counts, dtype=int).unstack(fill_value=0)
+    .reindex(index=list(first_times), columns=['on_route', 'in_depot'], fill_value=0)
+    if timeline_counts else pd.DataFrame()
+)
+for time, on_route, in_depot in timeline.itertuples(name=None):
     print(f'{time}: {on_route} on route, {in_depot} in depot')
@@ -1,8 +1,6 @@
-from resilient_efleets.src.data.loader import load_all_network_data
-from resilient_efleets.src.fleet.schedule import load_bus_schedules
+from resilient_efleets.src.fleet.schedule import load_network_and_schedules
 
-d = load_all_network_data()
-b = load_bus_schedules(d['routes'], d['depots'])
+d, b = load_network_and_schedules()
 
 print(f'Buses: {len(b)}')
 print(f'Stops: {len(d["stops"])}')
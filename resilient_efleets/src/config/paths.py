@@ -1,15 +1,25 @@
 # src/config/paths.py
 import os
+from functools import lru_cache
 from pathlib import Path
 
+from resilient_efleets.src.config.settings import Paths
+
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 OUTPUT_DIR = PROJECT_ROOT / "output"
 
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+@lru_cache(maxsize=None)
 def data_path(filename: str) -> Path:
     return DATA_DIR / filename
 
 def output_path(filename: str) -> Path:
-    return OUTPUT_DIR / filename
\ No newline at end of file
+    return OUTPUT_DIR / filename
+
+# Pre-resolved (and memoized) paths of the bundled data files
+ROUTES_CSV_PATH = str(data_path(Paths.ROUTES_CSV))
+CHARGERS_CSV_PATH = str(data_path(Paths.CHARGERS_CSV))
+DEPOTS_CSV_PATH = str(data_path(Paths.DEPOTS_CSV))
+SCHEDULE_CSV_PATH = str(data_path(Paths.SCHEDULE_CSV))
@@ -27,9 +27,16 @@ class SimulationSettings:
     MIP_DELAY_COST_PER_SEC: float = 0.5
     MIP_UNSERVED_DEMAND_COST: float = 10.0
     MIP_BATTERY_DRAIN_PENALTY: float = 0.2
+    MIP_CHARGER_RADIUS_KM: float = 5.0  # Node → charger and charger → depot edges only within this range
+    MIP_MIN_EDGE_CANDIDATES: int = 2    # ...always keeping the nearest few, so no node is cut off
+    MIP_CONCURRENT_SOLVES: int = 4      # Gurobi: independent MIP solves with different strategies, first to finish wins (1 = off)
+    MIP_STATE_SOC_BUCKET_PERCENT: float = 5.0  # Skip re-optimizing while bus SOCs stay in the same bucket (and nothing else changed)
+    MIP_REOPTIMIZE_SECONDS: int = 600   # Fixed interval: longest time between MIP runs without a triggering event
 
     # Logging
     LOG_FILE_NAME: str = "simulation_log.csv"
+    VERBOSE: bool = False                 # Print agent messages as they happen instead of at the end of run()
+    EVENT_LOG_CAPACITY: int = 100_000     # Agent messages kept for the end-of-run flush (oldest dropped)
 
 
 @dataclass(frozen=True)
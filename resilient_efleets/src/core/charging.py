@@ -1,20 +1,26 @@
 # src/core/charging.py
 from dataclasses import dataclass, field
-from typing import List
+from typing import ClassVar, Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
 from .geometry import Location
 
-@dataclass
+@dataclass(slots=True)
 class ChargingStation:
     name: str
     location: Location
     capacity_kw: float = 100.0
     total_slots: int = 1
-    compatible_companies: List[str] = field(default_factory=lambda: ["Default"])
+    compatible_companies: FrozenSet[str] = field(default_factory=lambda: frozenset({"Default"}))
     operational: bool = True
 
     available_slots: int = field(init=False)
 
+    # Bumped by every occupy()/release() of any station, so availability caches can tell they are stale
+    slot_version: ClassVar[int] = 0
+
     def __post_init__(self):
+        # Hashed membership for is_available; no-op (same object) if already a frozenset
+        self.compatible_companies = frozenset(self.compatible_companies)
         self.available_slots = self.total_slots
 
     @property
@@ -29,9 +35,45 @@ class ChargingStation:
         )
 
     def occupy(self):
-        if self.available_slots > 0:
-            self.available_slots -= 1
+        self.available_slots = max(self.available_slots - 1, 0)
+        ChargingStation.slot_version += 1
 
     def release(self):
-        if self.available_slots < self.total_slots:
-            self.available_slots += 1
\ No newline at end of file
+        self.available_slots = min(self.available_slots + 1, self.total_slots)
+        ChargingStation.slot_version += 1
+
+
+class StationAvailability:
+    """
+    is_available() masks over one station list, one per company, built on first use.
+    All masks are dropped after any occupy()/release(); operational flags are not
+    tracked, so build a new instance whenever they may change (e.g. once per tick).
+    Station coordinates are also built on first use and kept for the instance's lifetime.
+    """
+
+    def __init__(self, stations: List[ChargingStation]):
+        self.stations = stations
+        self._masks: Dict[str, np.ndarray] = {}
+        self._version = ChargingStation.slot_version
+        self._coords: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def coords(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitude and longitude arrays aligned with stations"""
+        if self._coords is None:
+            self._coords = (
+                np.array([s.location.lat for s in self.stations], dtype=np.float64),
+                np.array([s.location.lon for s in self.stations], dtype=np.float64),
+            )
+        return self._coords
+
+    def mask(self, company: str) -> np.ndarray:
+        """Boolean array aligned with stations: available to company right now"""
+        if self._version != ChargingStation.slot_version:
+            self._masks.clear()
+            self._version = ChargingStation.slot_version
+        usable = self._masks.get(company)
+        if usable is None:
+            usable = self._masks[company] = np.fromiter(
+                (s.is_available(company) for s in self.stations), dtype=bool, count=len(self.stations)
+            )
+        return usable
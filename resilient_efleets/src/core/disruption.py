@@ -2,8 +2,11 @@
 from dataclasses import dataclass
 from datetime import datetime
 from typing import List
+import numpy as np
 
-@dataclass
+from .kernels import disruption_active
+
+@dataclass(slots=True)
 class DisruptionEvent:
     route_id: str
     affected_stop_ids: List[str]
@@ -12,4 +15,35 @@ class DisruptionEvent:
     description: str = ""
 
     def is_active(self, current_time: float) -> bool:
-        return self.start_time <= current_time <= self.end_time
\ No newline at end of file
+        return self.start_time <= current_time <= self.end_time
+
+
+class DisruptionIndex:
+    """
+    Parallel arrays over a set of disruption events for vectorized interval queries.
+    Build once per tick (or whenever the event list changes) and share across buses.
+    """
+
+    def __init__(self, events: List[DisruptionEvent]):
+        self.events = list(events)
+        self.starts = np.array([e.start_time for e in self.events], dtype=np.float64)
+        self.ends = np.array([e.end_time for e in self.events], dtype=np.float64)
+        self.route_ids = np.array([e.route_id for e in self.events], dtype=object)
+
+    def active_mask(self, current_time: float) -> np.ndarray:
+        """Boolean mask of events active at current_time (inclusive bounds, as is_active)."""
+        return disruption_active(self.starts, self.ends, float(current_time))
+
+    def active_events_at(self, current_time: float) -> np.ndarray:
+        """Indices of events active at current_time."""
+        return np.flatnonzero(self.active_mask(current_time))
+
+    def is_stop_disrupted(self, route_id: str, stop_id: str, current_time: float) -> bool:
+        """True if any active event on route_id affects stop_id."""
+        if not self.events:
+            return False
+        candidates = np.flatnonzero(self.active_mask(current_time) & (self.route_ids == route_id))
+        return any(stop_id in self.events[i].affected_stop_ids for i in candidates)
+
+    def __len__(self) -> int:
+        return len(self.events)
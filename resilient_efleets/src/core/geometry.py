@@ -1,16 +1,38 @@
 # src/core/geometry.py
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 from shapely.geometry import Point
 
-@dataclass(frozen=True)
+from .kernels import EARTH_RADIUS_KM
+
+
+@lru_cache(maxsize=100_000)
+def _make_point(lon: float, lat: float) -> Point:
+    """Shared (immutable) shapely Point per coordinate pair."""
+    return Point(lon, lat)
+
+
+@dataclass(frozen=True, slots=True)
 class Location:
     lat: float
     lon: float
 
     @property
     def geometry(self) -> Point:
-        return Point(self.lon, self.lat)  # shapely uses (lon, lat)
+        return _make_point(self.lon, self.lat)  # shapely uses (lon, lat)
 
     @property
     def tuple_latlon(self):
-        return (self.lat, self.lon)
\ No newline at end of file
+        return (self.lat, self.lon)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in meters from (lat1, lon1) to (lat2, lon2), in degrees.
+    Broadcasts: one point against arrays of points gives an array of distances.
+    Within a fraction of a percent of the ellipsoidal geodesic at city scale.
+    """
+    lat1, lon1, lat2, lon2 = np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2000.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
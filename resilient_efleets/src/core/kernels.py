@@ -0,0 +1,131 @@
+# src/core/kernels.py
+"""
+Numeric kernels for the simulation hot path, operating on plain NumPy arrays
+(DisruptionIndex, flood sampling, edge distances, bus moves, MIP coefficient
+assembly).
+Compiled with Numba when it is installed; otherwise they run as plain Python/NumPy.
+The batch loop kernels are only worth calling when NUMBA_AVAILABLE; callers keep
+a vectorized NumPy path for the fallback.
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports both @njit and @njit(...))."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# Fast-math flags minus 'nnan'/'ninf': NaN marks missing coordinates and out-of-bounds cells
+FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+EARTH_RADIUS_KM = 6371.0
+
+
+@njit(cache=True)
+def disruption_active(starts: np.ndarray, ends: np.ndarray, t: float) -> np.ndarray:
+    """Boolean mask of intervals [starts, ends] containing t."""
+    return (starts <= t) & (t <= ends)
+
+
+@njit(parallel=True, fastmath=FASTMATH, cache=True)
+def batch_haversine_km(lat_a: np.ndarray, lon_a: np.ndarray, lat_b: np.ndarray, lon_b: np.ndarray,
+                       out: np.ndarray) -> np.ndarray:
+    """Element-wise haversine distance (km) between (lat, lon) arrays in degrees, written into out."""
+    for i in prange(lat_a.size):
+        lat1 = math.radians(lat_a[i])
+        lat2 = math.radians(lat_b[i])
+        dlat = lat2 - lat1
+        dlon = math.radians(lon_b[i] - lon_a[i])
+        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+        out[i] = EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+    return out
+
+
+@njit(parallel=True, fastmath=FASTMATH, cache=True)
+def batch_sample_raster(raster: np.ndarray, inv_transform: np.ndarray, lons: np.ndarray, lats: np.ndarray,
+                        order: np.ndarray, nodata: float, out: np.ndarray) -> np.ndarray:
+    """
+    Raster value at each (lon, lat), written into out; 0 outside the raster and
+    for nodata, NaN or non-positive cells. inv_transform holds the six inverse
+    affine coefficients; points are visited in the given order (e.g. sorted by cell).
+    Pass nodata=NaN if the raster has none.
+    """
+    a, b, c = inv_transform[0], inv_transform[1], inv_transform[2]
+    d, e, f = inv_transform[3], inv_transform[4], inv_transform[5]
+    n_rows, n_cols = raster.shape
+    for k in prange(order.size):
+        i = order[k]
+        # Float floor keeps NaN coordinates NaN, so they fail the bounds check
+        col = np.floor(a * lons[i] + b * lats[i] + c)
+        row = np.floor(d * lons[i] + e * lats[i] + f)
+        value = 0.0
+        if 0 <= row < n_rows and 0 <= col < n_cols:
+            depth = float(raster[int(row), int(col)])
+            if depth == depth and depth != nodata and depth > 0:  # depth == depth: not NaN
+                value = depth
+        out[i] = value
+    return out
+
+
+@njit(cache=True)
+def soc_dynamics_csr(n_bus: int, horizon: int, y_bus: np.ndarray, y_t: np.ndarray, y_coef: np.ndarray,
+                     ch_bus: np.ndarray, ch_t: np.ndarray, ch_coef: np.ndarray):
+    """
+    CSR (indptr, indices, data) of the MIP SOC dynamics, one row per (bus, minute < horizon):
+    soc[b, t+1] - soc[b, t] + sum(y_coef * y) - sum(ch_coef * charge) == 0.
+    Columns are the soc variables (bus-major, horizon + 1 per bus), then y, then charge.
+    """
+    n_rows = n_bus * horizon
+    counts = np.full(n_rows, 2, dtype=np.int64)
+    for j in range(y_bus.size):
+        counts[y_bus[j] * horizon + y_t[j]] += 1
+    for j in range(ch_bus.size):
+        if ch_t[j] < horizon:
+            counts[ch_bus[j] * horizon + ch_t[j]] += 1
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(counts)
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    data = np.empty(indptr[-1], dtype=np.float64)
+
+    fill = indptr[:-1].copy()
+    for r in range(n_rows):
+        col = (r // horizon) * (horizon + 1) + r % horizon
+        indices[fill[r]] = col
+        data[fill[r]] = -1.0
+        indices[fill[r] + 1] = col + 1
+        data[fill[r] + 1] = 1.0
+        fill[r] += 2
+    y_offset = n_bus * (horizon + 1)
+    for j in range(y_bus.size):
+        r = y_bus[j] * horizon + y_t[j]
+        indices[fill[r]] = y_offset + j
+        data[fill[r]] = y_coef[j]
+        fill[r] += 1
+    ch_offset = y_offset + y_bus.size
+    for j in range(ch_bus.size):
+        if ch_t[j] < horizon:
+            r = ch_bus[j] * horizon + ch_t[j]
+            indices[fill[r]] = ch_offset + j
+            data[fill[r]] = -ch_coef[j]
+            fill[r] += 1
+    return indptr, indices, data
+
+
+@njit(parallel=True, cache=True)
+def batch_soc_after_move(soc: np.ndarray, battery_kwh: np.ndarray, distance_m: np.ndarray,
+                         kwh_per_km: float, out: np.ndarray) -> np.ndarray:
+    """
+    SOC (percent, unclamped) of each bus after driving distance_m meters, written into out.
+    No fast-math: results match the scalar Bus.step arithmetic bit for bit.
+    """
+    for i in prange(soc.size):
+        out[i] = soc[i] - (distance_m[i] / 1000 * kwh_per_km / battery_kwh[i] * 100)
+    return out
@@ -1,10 +1,11 @@
 # src/core/route.py
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
+import numpy as np
 from shapely.geometry import Point
-from .geometry import Location
+from .geometry import Location, haversine_m
 
-@dataclass
+@dataclass(slots=True)
 class Stop:
     """
     Represents a bus stop (or stage) in the network.
@@ -23,78 +24,159 @@ class Stop:
         return hash(self.stop_id)
 
 
-@dataclass
+@dataclass(slots=True)
 class RouteSegment:
     """
     Represents the segment between two consecutive stops on a route.
     Stores pre-computed distance (in meters) if available.
+    Route keeps distances as an array and builds these views on demand.
     """
     from_stop: Stop
     to_stop: Stop
     distance_meters: Optional[float] = None  # None → will be calculated on-the-fly
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class RouteArrays:
+    """
+    Structure-of-arrays view of a route for the simulation hot path.
+    Stop-aligned arrays have one entry per stop position (NaN/None for gaps);
+    distances[i] is the segment from stop i to stop i + 1 (NaN if unknown).
+    """
+    stop_ids: np.ndarray                # object
+    lats: np.ndarray                    # float64
+    lons: np.ndarray                    # float64
+    distances: np.ndarray               # float32, meters (same array as Route.distances)
+    cumulative_distances: np.ndarray    # float32, meters from first stop (unknown counted as 0)
+
+
+@dataclass(slots=True)
 class Route:
     """
     A fixed bus route consisting of an ordered sequence of stops.
     Supports sparse stop lists (gaps with None) if needed, but we keep it clean.
+    Segment distances are stored as one float32 array: distances[i] is the
+    distance (meters) from stop i to stop i + 1, NaN if not known.
     """
     route_id: str
     name: str
     stops: List[Stop] = field(default_factory=list)
-    segments: List[RouteSegment] = field(default_factory=list, init=False)
+    distances: Optional[np.ndarray] = field(default=None, compare=False)
+    _arrays: Optional[RouteArrays] = field(default=None, init=False, repr=False, compare=False)
+    _stop_index: Optional[Dict[str, int]] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        self._build_segments()
+        n_segments = max(len(self.stops) - 1, 0)
+        if self.distances is None:
+            self.distances = np.full(n_segments, np.nan, dtype=np.float32)
+        else:
+            self.distances = np.asarray(self.distances, dtype=np.float32)
+            if len(self.distances) != n_segments:
+                raise ValueError(
+                    f"Route {self.route_id}: expected {n_segments} segment distances, got {len(self.distances)}"
+                )
 
-    def _build_segments(self):
-        """Rebuild segments whenever stops are modified."""
-        self.segments = []
-        for i in range(len(self.stops) - 1):
-            segment = RouteSegment(
+    @property
+    def segments(self) -> List[RouteSegment]:
+        """
+        Per-segment objects built on demand (for API compatibility).
+        These are copies; update distances through self.distances.
+        """
+        return [
+            RouteSegment(
                 from_stop=self.stops[i],
                 to_stop=self.stops[i + 1],
-                distance_meters=None  # Will be filled later if data available
+                distance_meters=None if np.isnan(distance) else float(distance)
             )
-            self.segments.append(segment)
+            for i, distance in enumerate(self.distances)
+        ]
 
     def add_stop(self, stop: Stop, sequence_number: int, distance_to_previous: Optional[float] = None):
         """
         Add a stop at a specific sequence position (1-based as in original data).
         Expands the list if needed and updates distances.
         """
+        self._arrays = None
+        self._stop_index = None
         target_idx = sequence_number - 1
-        while len(self.stops) < sequence_number:
-            self.stops.append(None)
-        
+        if len(self.stops) < sequence_number:
+            self.stops.extend([None] * (sequence_number - len(self.stops)))
+
         self.stops[target_idx] = stop
-        
-        # If this is not the first stop and we have a distance, store it on previous segment
+
+        # Extend distances for any newly added tail positions (one per consecutive pair)
+        missing = len(self.stops) - 1 - len(self.distances)
+        if missing > 0:
+            self.distances = np.concatenate([self.distances, np.full(missing, np.nan, dtype=np.float32)])
+
+        # If we have a distance, store it on the segment ending at this stop
         if target_idx > 0 and distance_to_previous is not None:
-            prev_segment = RouteSegment(
-                from_stop=self.stops[target_idx - 1],
-                to_stop=stop,
-                distance_meters=distance_to_previous
-            )
-            # Replace or append the segment
-            if target_idx - 1 < len(self.segments):
-                self.segments[target_idx - 1] = prev_segment
-            else:
-                self.segments.append(prev_segment)
-        
-        # Rebuild remaining segments to keep consistency
-        self._build_segments()
+            self.distances[target_idx - 1] = distance_to_previous
+
+    def fill_missing_distances(self) -> int:
+        """
+        Fill unknown segment distances between two known stops with their great-circle
+        distance, so the simulation never has to compute one per step.
+        Segments next to a gap (None stop) stay NaN. Returns the number filled.
+        """
+        missing = np.flatnonzero(np.isnan(self.distances))
+        if missing.size == 0:
+            return 0
+        arrays = self.arrays()
+        lat_a, lon_a = arrays.lats[missing], arrays.lons[missing]
+        lat_b, lon_b = arrays.lats[missing + 1], arrays.lons[missing + 1]
+        known = ~(np.isnan(lat_a) | np.isnan(lat_b))
+        self.distances[missing[known]] = haversine_m(lat_a[known], lon_a[known], lat_b[known], lon_b[known])
+        self.invalidate_arrays()
+        return int(known.sum())
 
     def get_distance_to_next_stop(self, current_stop_index: int) -> Optional[float]:
         """
         Return pre-loaded distance (meters) to the next stop if available.
         Index is the current position in the stops list (0 = at first stop).
         """
-        if current_stop_index >= len(self.segments):
+        if current_stop_index >= len(self.distances):
             return None
-        segment = self.segments[current_stop_index]
-        return segment.distance_meters
+        distance = self.distances[current_stop_index]
+        return None if np.isnan(distance) else float(distance)
+
+    def arrays(self) -> RouteArrays:
+        """
+        Return the cached structure-of-arrays view of this route, building it on first use.
+        The cache is dropped by add_stop(); call invalidate_arrays() after editing
+        stops or distances directly.
+        """
+        if self._arrays is None:
+            n_stops = len(self.stops)
+            cumulative = np.zeros(n_stops, dtype=np.float32)
+            if n_stops > 1:
+                np.cumsum(np.nan_to_num(self.distances), out=cumulative[1:])
+            self._arrays = RouteArrays(
+                stop_ids=np.array([s.stop_id if s is not None else None for s in self.stops], dtype=object),
+                lats=np.fromiter((s.location.lat if s is not None else np.nan for s in self.stops),
+                                 dtype=np.float64, count=n_stops),
+                lons=np.fromiter((s.location.lon if s is not None else np.nan for s in self.stops),
+                                 dtype=np.float64, count=n_stops),
+                distances=self.distances,
+                cumulative_distances=cumulative
+            )
+        return self._arrays
+
+    @property
+    def stop_index(self) -> Dict[str, int]:
+        """stop_id -> position of its first occurrence in stops (cached like arrays())."""
+        if self._stop_index is None:
+            index: Dict[str, int] = {}
+            for idx, stop in enumerate(self.stops):
+                if stop is not None:
+                    index.setdefault(stop.stop_id, idx)
+            self._stop_index = index
+        return self._stop_index
+
+    def invalidate_arrays(self):
+        """Drop the cached array view and stop index so they are rebuilt on next access."""
+        self._arrays = None
+        self._stop_index = None
 
     @property
     def stop_ids(self) -> List[str]:
@@ -9,90 +9,204 @@ Loads CSV files and constructs the core network objects:
 - Returns a fully initialized NetworkState (or dict) ready for simulation
 """
 
+import pickle
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, FrozenSet, List, Sequence, Tuple
 
 from resilient_efleets.src.core.geometry import Location
 from resilient_efleets.src.core.route import Stop, Route
 from resilient_efleets.src.core.charging import ChargingStation
 from resilient_efleets.src.core.depot import Depot
-from resilient_efleets.src.config.paths import data_path
+from resilient_efleets.src.config.paths import (
+    data_path, output_path, ROUTES_CSV_PATH, CHARGERS_CSV_PATH, DEPOTS_CSV_PATH
+)
+
+# Modules defining the objects stored in pickle caches; editing them invalidates the cache
+CORE_SOURCES = sorted(str(p) for p in (Path(__file__).parent.parent / "core").glob("*.py")) + [__file__]
+
+
+def read_csv_cached(filename: str) -> pd.DataFrame:
+    """
+    Read a CSV from the data directory (or an absolute path), caching it as a Parquet file alongside.
+    The cache is reused while it is at least as new as the CSV.
+    Falls back to plain CSV parsing if no Parquet engine is installed.
+    """
+    csv_path = data_path(filename)
+    parquet_path = csv_path.with_suffix(".parquet")
+
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass
+        except Exception as e:
+            print(f"Warning: Failed to read cache {parquet_path.name}: {e}")
+
+    df = pd.read_csv(str(csv_path))
+    try:
+        df.to_parquet(parquet_path, index=False)
+    except ImportError:
+        pass  # No parquet engine available; keep reading the CSV
+    except Exception as e:
+        print(f"Warning: Failed to cache {csv_path.name} as parquet: {e}")
+        parquet_path.unlink(missing_ok=True)
+    return df
+
+
+def cached_build(
+    cache_name: str,
+    source_paths: Sequence[str],
+    build: Callable[[], Any],
+    extra_key: Any = None
+) -> Any:
+    """
+    Return build(), pickling the result to output/.cache/<cache_name>.
+    The pickle is reused while none of source_paths changed (mtime and size)
+    and extra_key is equal, skipping CSV parsing and object construction.
+    """
+    cache_path = output_path(".cache") / cache_name
+    key = [extra_key] + [(str(p), Path(p).stat().st_mtime_ns, Path(p).stat().st_size) for p in source_paths]
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                cached_key, value = pickle.load(f)
+            if cached_key == key:
+                return value
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable cache {cache_path.name}: {e}")
+
+    value = build()
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"Warning: Failed to write cache {cache_path.name}: {e}")
+        cache_path.unlink(missing_ok=True)
+    return value
 
 
 def load_stops_and_routes(
-    routes_csv: str = "TVM Route.csv"
+    routes_csv: str = ROUTES_CSV_PATH
 ) -> Tuple[Dict[str, Stop], List[Route]]:
     """
     Load stops and routes from the routes CSV.
     Ensures stops are unique (shared across routes).
     Handles sequence numbers and consecutive distances.
     """
-    df = pd.read_csv(data_path(routes_csv))
+    df = read_csv_cached(routes_csv)
+    df["Stop Id"] = df["Stop Id"].astype(str).str.strip()
+    df["Route id"] = df["Route id"].astype(str).str.strip()
+    if "Consecutive Distance(m)" not in df:
+        df["Consecutive Distance(m)"] = float("nan")
 
-    # Create unique Stop objects
+    # Create unique Stop objects (first occurrence of each stop id wins)
+    stops_df = df.drop_duplicates("Stop Id")
     stops: Dict[str, Stop] = {}
-    for _, row in df.iterrows():
-        stop_id = str(row["Stop Id"]).strip()
-        if stop_id not in stops:
-            stops[stop_id] = Stop(
-                stop_id=stop_id,
-                name=str(row["Stop Name"]).strip(),
-                location=Location(
-                    lat=float(row["Stop lat"]),
-                    lon=float(row["Stop lon"])
-                ),
-                is_stage=bool(row.get("isStage", False)),
-                demand=float(row.get("demand", 1.0))
-            )
-
-    # Create Routes and assign stops
-    routes: Dict[str, Route] = {}
-    for _, row in df.iterrows():
-        route_id = str(row["Route id"]).strip()
-        if route_id not in routes:
-            routes[route_id] = Route(
-                route_id=route_id,
-                name=str(row["Route Name"]).strip()
-            )
-
-        route = routes[route_id]
-        stop = stops[str(row["Stop Id"]).strip()]
-        seq_num = int(row["Seq Number"])
-        distance = row.get("Consecutive Distance(m)")
-        distance_meters = float(distance) if pd.notna(distance) else None
-
-        # Add stop with distance to previous (if not first)
-        route.add_stop(stop, seq_num, distance_to_previous=distance_meters)
-
-    return stops, list(routes.values())
+    for stop_id, name, lat, lon, is_stage, demand in zip(
+        stops_df["Stop Id"].to_numpy(),
+        stops_df["Stop Name"].astype(str).str.strip().to_numpy(),
+        stops_df["Stop lat"].to_numpy(dtype=float),
+        stops_df["Stop lon"].to_numpy(dtype=float),
+        stops_df["isStage"].to_numpy() if "isStage" in stops_df else [False] * len(stops_df),
+        stops_df["demand"].to_numpy(dtype=float) if "demand" in stops_df else [1.0] * len(stops_df),
+    ):
+        stops[stop_id] = Stop(
+            stop_id=stop_id,
+            name=name,
+            location=Location(lat=float(lat), lon=float(lon)),
+            is_stage=bool(is_stage),
+            demand=float(demand)
+        )
+
+    # Precompute per-route stop ordering once: routes in order of first appearance,
+    # rows by sequence number (lexsort is stable, so later duplicate rows still win)
+    route_order = pd.factorize(df["Route id"])[0]
+    df = df.iloc[np.lexsort((df["Seq Number"].to_numpy(), route_order))]
+    df = df.assign(_stop=df["Stop Id"].map(stops))
+
+    # Create Routes in one shot per group, bypassing add_stop
+    routes: List[Route] = []
+    for route_id, group in df.groupby("Route id", sort=False):
+        seq_nums = group["Seq Number"].to_numpy(dtype=int)
+        group_stops = group["_stop"].tolist()
+        group_distances = group["Consecutive Distance(m)"].to_numpy(dtype=float)
+
+        if np.array_equal(seq_nums, np.arange(1, len(seq_nums) + 1)):
+            # Contiguous 1..n sequence (the normal case): rows are already in stop order
+            route_stops: List[Stop] = group_stops
+            distances = group_distances
+        else:
+            # Gaps or duplicate sequence numbers: place each row at its position
+            route_stops = [None] * int(seq_nums.max())
+            distances = np.full(len(route_stops), np.nan)
+            for stop, seq_num, distance in zip(group_stops, seq_nums, group_distances):
+                route_stops[seq_num - 1] = stop
+                if pd.notna(distance):
+                    distances[seq_num - 1] = distance
+
+        # Distance to previous stop belongs to the segment ending at that stop
+        route = Route(
+            route_id=route_id,
+            name=str(group["Route Name"].iloc[0]).strip(),
+            stops=route_stops,
+            distances=distances[1:]
+        )
+        route.fill_missing_distances()  # Bus steps then read every known segment from the array
+        route.arrays()  # Build the array view once, up front
+        routes.append(route)
+
+    return stops, routes
+
+
+@lru_cache(maxsize=None)
+def _parse_companies(raw: str) -> FrozenSet[str]:
+    """Parse a comma-separated company list; identical strings share one frozenset."""
+    return frozenset(c.strip() for c in raw.split(","))
 
 
 def load_charging_stations(
-    chargers_csv: str = "Charger.csv"
+    chargers_csv: str = CHARGERS_CSV_PATH
 ) -> List[ChargingStation]:
     """
     Load charging stations from CSV.
     """
-    df = pd.read_csv(data_path(chargers_csv))
+    df = read_csv_cached(chargers_csv)
 
-    stations: List[ChargingStation] = []
-    for _, row in df.iterrows():
-        compatible = row.get("Compatible Companies", "Default")
-        if pd.isna(compatible):
-            compatible_list = ["Default"]
-        else:
-            compatible_list = [c.strip() for c in str(compatible).split(",")]
+    # Resolve optional columns and NaN defaults once, column-wise
+    compatible = (
+        df["Compatible Companies"] if "Compatible Companies" in df
+        else pd.Series("Default", index=df.index)
+    )
+    compatible_sets = compatible.fillna("Default").astype(str).map(_parse_companies)
+    capacities = (
+        df["Charger Capacity (kW)"].to_numpy(dtype=float) if "Charger Capacity (kW)" in df
+        else [50.0] * len(df)
+    )
+    slots = (
+        df["Number of Chargers"].to_numpy(dtype=int) if "Number of Chargers" in df
+        else [1] * len(df)
+    )
 
+    stations: List[ChargingStation] = []
+    for name, lat, lon, capacity_kw, total_slots, compatible_set in zip(
+        df["Location Name"].astype(str).str.strip().to_numpy(),
+        df["Latitude"].to_numpy(dtype=float),
+        df["Longitude"].to_numpy(dtype=float),
+        capacities,
+        slots,
+        compatible_sets.to_numpy(),
+    ):
         station = ChargingStation(
-            name=str(row["Location Name"]).strip(),
-            location=Location(
-                lat=float(row["Latitude"]),
-                lon=float(row["Longitude"])
-            ),
-            capacity_kw=float(row.get("Charger Capacity (kW)", 50.0)),
-            total_slots=int(row.get("Number of Chargers", 1)),
-            compatible_companies=compatible_list
+            name=name,
+            location=Location(lat=float(lat), lon=float(lon)),
+            capacity_kw=float(capacity_kw),
+            total_slots=int(total_slots),
+            compatible_companies=compatible_set
         )
         stations.append(station)
 
@@ -100,47 +214,58 @@ def load_charging_stations(
 
 
 def load_depots(
-    depots_csv: str = "Depot.csv"
+    depots_csv: str = DEPOTS_CSV_PATH
 ) -> Dict[str, Depot]:
     """
     Load depots and return as dict: name -> Depot
     """
-    df = pd.read_csv(data_path(depots_csv))
+    df = read_csv_cached(depots_csv)
 
     depots: Dict[str, Depot] = {}
-    for _, row in df.iterrows():
-        depot = Depot(
-            name=str(row["Depot Name"]).strip(),
-            location=Location(
-                lat=float(row["Latitude"]),
-                lon=float(row["Longitude"])
-            )
+    for name, lat, lon in zip(
+        df["Depot Name"].astype(str).str.strip().to_numpy(),
+        df["Latitude"].to_numpy(dtype=float),
+        df["Longitude"].to_numpy(dtype=float),
+    ):
+        depots[name] = Depot(
+            name=name,
+            location=Location(lat=float(lat), lon=float(lon))
         )
-        depots[depot.name] = depot
 
     return depots
 
 
-def load_all_network_data() -> dict:
+def _build_network_data() -> dict:
+    stops, routes = load_stops_and_routes()
+    return {
+        "stops": stops,
+        "routes": routes,
+        "charging_stations": load_charging_stations(),
+        "depots": load_depots()
+    }
+
+
+def load_all_network_data(use_cache: bool = True) -> dict:
     """
     Convenience function to load everything at once.
     Returns a dictionary compatible with the rest of the simulation modules.
+    With use_cache, the built objects are pickled and reused until a CSV changes.
     """
     print("Loading network data...")
 
-    stops, routes = load_stops_and_routes()
-    charging_stations = load_charging_stations()
-    depots = load_depots()
+    if use_cache:
+        data = cached_build(
+            "network_data.pkl",
+            [ROUTES_CSV_PATH, CHARGERS_CSV_PATH, DEPOTS_CSV_PATH] + CORE_SOURCES,
+            _build_network_data
+        )
+    else:
+        data = _build_network_data()
 
     print(f"Loaded:")
-    print(f"  - {len(stops)} unique stops")
-    print(f"  - {len(routes)} routes")
-    print(f"  - {len(charging_stations)} charging stations")
-    print(f"  - {len(depots)} depots")
+    print(f"  - {len(data['stops'])} unique stops")
+    print(f"  - {len(data['routes'])} routes")
+    print(f"  - {len(data['charging_stations'])} charging stations")
+    print(f"  - {len(data['depots'])} depots")
 
-    return {
-        "stops": stops,
-        "routes": routes,
-        "charging_stations": charging_stations,
-        "depots": depots
-    }
\ No newline at end of file
+    return data
\ No newline at end of file
@@ -4,18 +4,33 @@ Bus agent class with full behavioral logic.
 """
 
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Dict, Optional, Any
+from enum import IntEnum
+from typing import List, Dict, Optional, Any, Tuple
 import time
 import random
-from geopy.distance import geodesic
+import numpy as np
 
-from resilient_efleets.src.core.geometry import Location
+from resilient_efleets.src.core.geometry import Location, haversine_m
 from resilient_efleets.src.core.route import Route, Stop
-from resilient_efleets.src.core.charging import ChargingStation
+from resilient_efleets.src.core.charging import ChargingStation, StationAvailability
 from resilient_efleets.src.core.depot import Depot
-from resilient_efleets.src.core.disruption import DisruptionEvent
+from resilient_efleets.src.core.disruption import DisruptionEvent, DisruptionIndex
 from resilient_efleets.src.config.settings import SimulationSettings
+from resilient_efleets.src.simulation.event_log import event_log
+
+
+class BusStatus(IntEnum):
+    """Bus.status; int codes so status checks are int compares and fleet arrays hold them as int8"""
+    IN_DEPOT = 0
+    IDLE = 1
+    ON_ROUTE = 2
+    CHARGING = 3
+    HEADING_TO_CHARGER = 4
+    RETURNING_TO_DEPOT = 5
+    STRANDED = 6
+
+    def __str__(self) -> str:
+        return self.name.lower()  # e.g. "on_route", as written to the simulation log
 
 
 @dataclass
@@ -40,7 +55,7 @@ class Bus:
     current_location: Location = field(init=False)
     current_route: Optional[Route] = None
     current_stop_index: int = 0         # Index of NEXT stop to visit
-    status: str = "in_depot"            # in_depot, on_route, charging, returning_to_depot, stranded
+    status: BusStatus = BusStatus.IN_DEPOT
     delay_seconds: float = 0.0
     unserved_demand: float = 0.0
 
@@ -55,6 +70,10 @@ class Bus:
     # MIP decision (set externally)
     mip_decision: Optional[Dict[str, Any]] = None
 
+    # (distance_m, soc_after, traffic delay s) of the next-stop move, precomputed by
+    # BusFleet.plan_moves for the coming step only
+    planned_move: Optional[Tuple[float, float, int]] = field(default=None, init=False, repr=False)
+
     def __post_init__(self):
         if self.home_depot is None:
             self.home_depot = self.depot
@@ -80,30 +99,37 @@ class Bus:
         next_stop = self.current_route.stops[self.current_stop_index]
         if next_stop is None:
             return None
-        precomputed = self.current_route.get_distance_to_next_stop(self.current_stop_index - 1 if self.current_stop_index > 0 else 0)
-        if precomputed is not None:
-            return precomputed
-        # Fallback to geodesic - use depot location if current_location not set
+        if self.current_stop_index > 0:
+            # Segment (index - 1) -> index; loaders fill every known one via Route.fill_missing_distances
+            precomputed = self.current_route.get_distance_to_next_stop(self.current_stop_index - 1)
+            if precomputed is not None:
+                return precomputed
+        # Great-circle distance from where the bus is: the leg to the first stop (from the
+        # depot or wherever it was dispatched) is not a route segment, and segments next to
+        # a gap in a sparse route are unknown; the depot stands in if current_location is not set
         current_loc = self.current_location if hasattr(self, 'current_location') else self.depot.location
-        return geodesic(current_loc.tuple_latlon, next_stop.location.tuple_latlon).meters
+        return float(haversine_m(current_loc.lat, current_loc.lon, next_stop.location.lat, next_stop.location.lon))
 
     def is_critical_soc(self) -> bool:
         return self.soc < SimulationSettings.CRITICAL_SOC_PERCENT
 
-    def find_nearest_charger(self, stations: List[ChargingStation]) -> Optional[ChargingStation]:
-        compatible_available = [
-            s for s in stations
-            if s.is_available(self.company)
-        ]
-        if not compatible_available:
+    def find_nearest_charger(
+        self,
+        stations: List[ChargingStation],
+        availability: Optional[StationAvailability] = None
+    ) -> Optional[ChargingStation]:
+        """Nearest station available to this bus; availability (over stations) saves re-checking each one"""
+        if availability is None or availability.stations is not stations:
+            availability = StationAvailability(stations)
+        usable = availability.mask(self.company)
+        if not usable.any():
             return None
 
-        distances = [
-            geodesic(self.current_location.tuple_latlon, s.location.tuple_latlon).meters
-            for s in compatible_available
-        ]
-        nearest_idx = int(min(enumerate(distances), key=lambda x: x[1])[0])
-        return compatible_available[nearest_idx]
+        # Distances to all stations in one vectorized call
+        lats, lons = availability.coords()
+        dists = haversine_m(self.current_location.lat, self.current_location.lon, lats, lons)
+        candidates = np.flatnonzero(usable)
+        return stations[int(candidates[dists[candidates].argmin()])]
 
     def start_charging(self, station: ChargingStation, current_sim_time: float):
         required_kwh = (100 - self.soc) / 100 * self.battery_capacity_kwh
@@ -115,41 +141,47 @@ class Bus:
         self.charging_end_time = current_sim_time + charging_time_sec  # Use sim time
         station.occupy()
         self.current_location = station.location
-        self.status = "charging"
-        print(f"[{datetime.fromtimestamp(current_sim_time)}] {self.bus_id} started charging at {station.name}")
+        self.status = BusStatus.CHARGING
+        event_log.log(current_sim_time, "charge_start", self.bus_id, station.name)
 
     def finish_charging(self, current_sim_time: float):
         if self.charging_station:
             self.charging_station.release()
             self.charging_station = None
         self.soc = 100.0
-        self.status = "in_depot"  # or "idle"
+        self.status = BusStatus.IN_DEPOT  # or IDLE
         self.charging_end_time = None
-        print(f"[{datetime.fromtimestamp(current_sim_time)}] {self.bus_id} finished charging")
+        event_log.log(current_sim_time, "charge_end", self.bus_id)
 
     def return_to_depot(self, current_sim_time: float):
-        dist_m = geodesic(self.current_location.tuple_latlon, self.home_depot.location.tuple_latlon).meters
-        dist_km = dist_m / 1000
+        depot_loc = self.home_depot.location
+        dist_km = float(haversine_m(self.current_location.lat, self.current_location.lon, depot_loc.lat, depot_loc.lon)) / 1000
         if self.soc * self.battery_capacity_kwh / 100 < dist_km * SimulationSettings.ENERGY_CONSUMPTION_KWH_PER_KM:
-            self.status = "stranded"
-            print(f"[{datetime.fromtimestamp(current_sim_time)}] {self.bus_id} stranded - cannot reach depot")
+            self.status = BusStatus.STRANDED
+            event_log.log(current_sim_time, "stranded", self.bus_id)
             return
         self.update_soc(dist_km)
         self.current_location = self.home_depot.location
-        self.status = "in_depot"
-        print(f"[{datetime.fromtimestamp(current_sim_time)}] {self.bus_id} returned to depot")
+        self.status = BusStatus.IN_DEPOT
+        event_log.log(current_sim_time, "returned", self.bus_id)
 
     def step(self, context: Dict):
         """
         Main agent step function called every simulation tick.
         context contains: current_sim_time, stations, disruptions, etc.
+        Disrupted stops are looked up in context["disruption_pairs"] (a set of
+        (route_id, stop_id)) when given, else in a DisruptionIndex.
         """
         current_time = context["current_sim_time"]
         stations = context["stations"]
-        disruptions = context["disruptions"]
+        disruption_pairs = context.get("disruption_pairs")
+        disruption_index = context.get("disruption_index")
+        if disruption_pairs is None and disruption_index is None:
+            disruption_index = DisruptionIndex(context["disruptions"])
+        planned_move, self.planned_move = self.planned_move, None
 
         # 1. Handle ongoing charging
-        if self.status == "charging":
+        if self.status == BusStatus.CHARGING:
             if self.charging_end_time <= current_time:
                 self.finish_charging(current_time)
             return
@@ -166,30 +198,30 @@ class Bus:
             self.mip_decision = None  # Clear after execution
 
         # 3. Dispatch if scheduled
-        if self.status in ["in_depot", "idle"] and self.current_trip_index < len(self.daily_schedule):
+        if self.status in (BusStatus.IN_DEPOT, BusStatus.IDLE) and self.current_trip_index < len(self.daily_schedule):
             next_trip = self.daily_schedule[self.current_trip_index]
             if current_time >= next_trip["start_time"]:
                 self.current_route = next_trip["route"]
                 self.current_stop_index = 0
-                self.status = "on_route"
+                self.status = BusStatus.ON_ROUTE
                 self.current_trip_index += 1
-                print(f"[{datetime.fromtimestamp(current_time)}] {self.bus_id} dispatched on {self.current_route.name}")
+                event_log.log(current_time, "dispatched", self.bus_id, self.current_route.name)
                 return
 
         # 4. On-route logic
-        if self.status == "on_route":
+        if self.status == BusStatus.ON_ROUTE:
             # Check for disruption on next segment
             next_stop = self.current_route.stops[self.current_stop_index] if self.current_stop_index < len(self.current_route.stops) else None
             if next_stop:
-                disrupted = any(
-                    d.is_active(current_time) and
-                    d.route_id == self.current_route.route_id and
-                    next_stop.stop_id in d.affected_stop_ids
-                    for d in disruptions
-                )
+                if disruption_pairs is not None:
+                    disrupted = (self.current_route.route_id, next_stop.stop_id) in disruption_pairs
+                else:
+                    disrupted = disruption_index.is_stop_disrupted(
+                        self.current_route.route_id, next_stop.stop_id, current_time
+                    )
                 if disrupted:
                     # Simple skip logic - can be enhanced
-                    print(f"{self.bus_id} skipping disrupted stop {next_stop.name}")
+                    event_log.log(current_time, "skip_stop", self.bus_id, next_stop.name)
                     self.unserved_demand += next_stop.demand
                     self.current_stop_index += 1
                     return
@@ -202,15 +234,20 @@ class Bus:
                 self.return_to_depot(current_time)
                 return
 
-            distance_m = self.get_distance_to_next_stop()
-            if distance_m is None:
-                return
+            if planned_move is not None:
+                distance_m, estimated_soc_after, traffic_delay = planned_move
+                distance_km = distance_m / 1000
+            else:
+                distance_m = self.get_distance_to_next_stop()
+                if distance_m is None:
+                    return
 
-            distance_km = distance_m / 1000
-            estimated_soc_after = self.soc - (distance_km * SimulationSettings.ENERGY_CONSUMPTION_KWH_PER_KM / self.battery_capacity_kwh * 100)
+                distance_km = distance_m / 1000
+                estimated_soc_after = self.soc - (distance_km * SimulationSettings.ENERGY_CONSUMPTION_KWH_PER_KM / self.battery_capacity_kwh * 100)
+                traffic_delay = random.randint(5, 30)
 
             if estimated_soc_after < SimulationSettings.CRITICAL_SOC_PERCENT:
-                charger = self.find_nearest_charger(stations)
+                charger = self.find_nearest_charger(stations, context.get("station_availability"))
                 if charger:
                     self.start_charging(charger, current_time)
                 else:
@@ -222,5 +259,5 @@ class Bus:
             next_stop = self.current_route.stops[self.current_stop_index]
             self.current_location = next_stop.location
             self.current_stop_index += 1
-            self.delay_seconds += random.randint(5, 30)  # Simulated traffic
-            print(f"[{datetime.fromtimestamp(current_time)}] {self.bus_id} arrived at {next_stop.name}, SoC={self.soc:.1f}%")
\ No newline at end of file
+            self.delay_seconds += traffic_delay  # Simulated traffic
+            event_log.log(current_time, "arrived", self.bus_id, next_stop.name, self.soc)
\ No newline at end of file
@@ -4,18 +4,37 @@ Loads the bus schedule CSV and assigns daily trips to individual buses.
 Creates Bus objects with their scheduled trips.
 """
 
+import inspect
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import List, Dict
-
-from resilient_efleets.src.data.loader import data_path
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Tuple
+
+from resilient_efleets.src.data.loader import (
+    read_csv_cached, cached_build, load_all_network_data, CORE_SOURCES
+)
+from resilient_efleets.src.config.paths import (
+    data_path, ROUTES_CSV_PATH, CHARGERS_CSV_PATH, DEPOTS_CSV_PATH, SCHEDULE_CSV_PATH
+)
 from resilient_efleets.src.core.route import Route
 from resilient_efleets.src.core.depot import Depot
 from resilient_efleets.src.fleet.bus import Bus  # Forward reference for type hinting; actual import later
 
 
+def _local_epochs(day: date, seconds: np.ndarray) -> np.ndarray:
+    """
+    Epoch timestamps of local wall-clock times day + seconds (NaN stays NaN).
+    Each distinct time is localized on its own, so times after a DST switch keep the right offset.
+    """
+    midnight = datetime.combine(day, datetime.min.time())
+    distinct, inverse = np.unique(seconds, return_inverse=True)
+    epochs = np.array([np.nan if np.isnan(sec) else (midnight + timedelta(seconds=sec)).timestamp()
+                       for sec in distinct], dtype=float)
+    return epochs[inverse.reshape(-1)]
+
+
 def load_bus_schedules(
-    schedule_csv: str = "Consolidated_Cleaned_Bus_Schedule.csv",
+    schedule_csv: str = SCHEDULE_CSV_PATH,
     routes: List[Route] = None,
     depots: Dict[str, Depot] = None
 ) -> List[Bus]:
@@ -33,72 +52,76 @@ def load_bus_schedules(
     if routes is None or depots is None:
         raise ValueError("Routes and depots must be provided for schedule loading.")
 
-    df = pd.read_csv(data_path(schedule_csv))
+    df = read_csv_cached(schedule_csv)
 
     # Create lookup dicts
     route_lookup: Dict[str, Route] = {r.route_id: r for r in routes}
     
-    # Temporary bus dict: duty_number -> Bus
-    buses: Dict[int, Bus] = {}
+    # Parse all departure/arrival times in one vectorized pass (seconds since midnight)
+    dep_times = pd.to_datetime(df["Departure Time"].astype(str).str.strip(), format="%H:%M", errors="coerce")
+    arr_times = pd.to_datetime(df["Arrival Time"].astype(str).str.strip(), format="%H:%M", errors="coerce")
+    dep_sec = (dep_times.dt.hour * 3600 + dep_times.dt.minute * 60).to_numpy(dtype=float)
+    arr_sec = (arr_times.dt.hour * 3600 + arr_times.dt.minute * 60).to_numpy(dtype=float)
 
-    today = datetime.now().date()
+    # Handle overnight trips
+    arr_sec = np.where(arr_sec < dep_sec, arr_sec + 86400, arr_sec)
 
-    for _, row in df.iterrows():
-        try:
-            duty_number = int(row["Duty Number"])
-            route_id = str(row["Route Id"]).strip()
-            departure_str = str(row["Departure Time"]).strip()
-            arrival_str = str(row["Arrival Time"]).strip()
-            depot_name = str(row["Depot Name"]).strip()
-
-            # Parse times
-            dep_time = datetime.strptime(departure_str, "%H:%M").time()
-            arr_time = datetime.strptime(arrival_str, "%H:%M").time()
-
-            departure_dt = datetime.combine(today, dep_time)
-            arrival_dt = datetime.combine(today, arr_time)
-
-            # Handle overnight trips
-            if arrival_dt < departure_dt:
-                arrival_dt += timedelta(days=1)
-
-            start_epoch = departure_dt.timestamp()
-            end_epoch = arrival_dt.timestamp()
-
-            # Get or create Bus
-            if duty_number not in buses:
-                depot = depots.get(depot_name)
-                if depot is None:
-                    print(f"Warning: Depot '{depot_name}' not found for duty {duty_number}. Skipping.")
-                    continue
-
-                bus = Bus(
-                    bus_id=f"Bus_{duty_number}",
-                    depot=depot,
-                    home_depot=depot  # Can be different later if needed
-                )
-                buses[duty_number] = bus
-            else:
-                bus = buses[duty_number]
-
-            # Get Route
-            route = route_lookup.get(route_id)
-            if route is None:
-                print(f"Warning: Route '{route_id}' not found for duty {duty_number}. Skipping trip.")
-                continue
-
-            # Append trip to schedule
-            bus.daily_schedule.append({
-                "route": route,
-                "start_time": start_epoch,
-                "end_time": end_epoch,
-                "depot": depots[depot_name]
-            })
-
-        except Exception as e:
-            print(f"Error processing schedule row for duty {duty_number}: {e}")
+    today = datetime.now().date()
+    start_epochs = _local_epochs(today, dep_sec)
+    end_epochs = _local_epochs(today, arr_sec)
+
+    # Resolve depots and routes with one bulk hash lookup per column (None if unknown)
+    route_ids = df["Route Id"].astype(str).str.strip()
+    depot_names = df["Depot Name"].astype(str).str.strip()
+    route_objs = route_ids.map(route_lookup).astype(object).where(lambda col: col.notna(), None)
+    depot_objs = depot_names.map(depots).astype(object).where(lambda col: col.notna(), None)
+
+    # Rows with an unparseable duty number or time are reported and skipped up front
+    duty_numbers = pd.to_numeric(df["Duty Number"], errors="coerce")
+    valid = (duty_numbers.notna() & ~np.isnan(start_epochs) & ~np.isnan(end_epochs)).to_numpy()
+    for duty in df["Duty Number"].to_numpy()[~valid]:
+        print(f"Error processing schedule row for duty {duty}: invalid duty number or departure/arrival time")
+
+    duty_numbers = duty_numbers.to_numpy()[valid].astype(int)
+    route_ids, route_objs = route_ids.to_numpy()[valid], route_objs.to_numpy()[valid]
+    depot_names, depot_objs = depot_names.to_numpy()[valid], depot_objs.to_numpy()[valid]
+    start_epochs, end_epochs = start_epochs[valid], end_epochs[valid]
+
+    # Create every Bus in one pass: from the first row of each duty that names a known depot
+    has_depot = np.array([d is not None for d in depot_objs], dtype=bool)
+    first_rows = pd.Series(duty_numbers[has_depot]).drop_duplicates().index
+    buses: Dict[int, Bus] = {
+        int(duty): Bus(
+            bus_id=f"Bus_{duty}",
+            depot=depot,
+            home_depot=depot  # Can be different later if needed
+        )
+        for duty, depot in zip(duty_numbers[has_depot][first_rows], depot_objs[has_depot][first_rows])
+    }
+
+    # Single pass attaching trips to their buses
+    for duty_number, route_id, route, depot_name, depot, start_epoch, end_epoch in zip(
+        duty_numbers, route_ids, route_objs, depot_names, depot_objs, start_epochs, end_epochs
+    ):
+        bus = buses.get(duty_number)
+        if bus is None:
+            print(f"Warning: Depot '{depot_name}' not found for duty {duty_number}. Skipping.")
+            continue
+        if route is None:
+            print(f"Warning: Route '{route_id}' not found for duty {duty_number}. Skipping trip.")
+            continue
+        if depot is None:
+            print(f"Warning: Depot '{depot_name}' not found for duty {duty_number}. Skipping trip.")
             continue
 
+        # Append trip to schedule
+        bus.daily_schedule.append({
+            "route": route,
+            "start_time": float(start_epoch),
+            "end_time": float(end_epoch),
+            "depot": depot
+        })
+
     # Sort trips chronologically for each bus
     for bus in buses.values():
         bus.daily_schedule.sort(key=lambda t: t["start_time"])
@@ -107,4 +130,32 @@ def load_bus_schedules(
     bus_list = sorted(buses.values(), key=lambda b: b.bus_id)
 
     print(f"Created {len(bus_list)} buses with scheduled trips.")
-    return bus_list
\ No newline at end of file
+    return bus_list
+
+
+def load_network_and_schedules(
+    schedule_csv: str = SCHEDULE_CSV_PATH,
+    use_cache: bool = True
+) -> Tuple[dict, List[Bus]]:
+    """
+    Load network data and bus schedules together.
+    Cached as one pickled object graph (so buses keep sharing the network's
+    Route/Depot objects); the cache is keyed on the CSVs and today's date,
+    since trip times are anchored to today.
+    """
+    def build():
+        network = load_all_network_data(use_cache=False)
+        buses = load_bus_schedules(schedule_csv, network["routes"], network["depots"])
+        return network, buses
+
+    if not use_cache:
+        return build()
+
+    sources = [
+        ROUTES_CSV_PATH, CHARGERS_CSV_PATH, DEPOTS_CSV_PATH, str(data_path(schedule_csv)),
+        __file__, inspect.getfile(Bus)
+    ] + CORE_SOURCES
+    return cached_build(
+        "network_and_schedules.pkl", sources, build,
+        extra_key=(str(schedule_csv), datetime.now().date().isoformat())
+    )
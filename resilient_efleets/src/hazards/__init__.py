@@ -1,12 +1,13 @@
 # src/hazards/__init__.py
 from .random_disruption import generate_random_disruption
-from .flood import FloodHazardConfig, FloodHazardMap, detect_flood_impact, apply_flood_impacts
+from .flood import FloodHazardConfig, FloodHazardMap, compute_aoi_bounds, detect_flood_impact, apply_flood_impacts
 from .manager import DisruptionManager
 
 __all__ = [
     "generate_random_disruption",
     "FloodHazardConfig",
     "FloodHazardMap",
+    "compute_aoi_bounds",
     "detect_flood_impact",
     "apply_flood_impacts",
     "DisruptionManager"
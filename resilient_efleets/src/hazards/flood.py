@@ -4,10 +4,24 @@ Flood hazard handling: Load flood depth maps (TIF raster) and detect impacted ne
 Supports threshold-based disruptions for routes, stops, charging stations, depots, and buses.
 """
 
+import hashlib
+import json
+import logging
+import math
 import numpy as np
 import rasterio
+from affine import Affine
+from rasterio.crs import CRS
 from rasterio.transform import rowcol
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
 from shapely.geometry import Point
+
+try:
+    # Vectorized geometry API (Shapely 2.0+)
+    from shapely import STRtree, box, points
+except ImportError:
+    STRtree = None
 from typing import List, Tuple, Dict, Optional, Set
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -16,7 +30,21 @@ from resilient_efleets.src.core.route import Route, Stop
 from resilient_efleets.src.core.charging import ChargingStation
 from resilient_efleets.src.core.depot import Depot
 from resilient_efleets.src.core.disruption import DisruptionEvent
-from resilient_efleets.src.config.paths import data_path
+from resilient_efleets.src.fleet.bus import BusStatus
+from resilient_efleets.src.core.kernels import NUMBA_AVAILABLE, batch_sample_raster
+from resilient_efleets.src.config.paths import data_path, output_path
+
+logger = logging.getLogger(__name__)
+
+# Guard band (degrees) added around the network extent when cropping the flood raster
+AOI_MARGIN_DEG = 0.01
+
+# Block size (pixels) of the wet-area index used to skip sampling points over dry raster blocks
+FLOOD_INDEX_BLOCK = 256
+
+# Part of the flood raster cache key; bump whenever the cached array's meaning changes
+# (dtype, units, nodata/negative handling, cropping)
+FLOOD_CACHE_VERSION = 1
 
 
 @dataclass
@@ -56,17 +84,67 @@ class FloodHazardConfig:
         if self.recession_cm_per_hr < 0:
             raise ValueError("recession_cm_per_hr cannot be negative")
 
+    @property
+    def flood_depth_threshold_cm(self) -> float:
+        """Threshold in the raster's unit (cm), so sampled depths are compared without conversion."""
+        return self.flood_depth_threshold_m * 100.0
+
+    @property
+    def static_dynamics(self) -> bool:
+        """True when depths do not change over time (no precipitation or recession)."""
+        return self.precipitation_cm_per_hr == 0 and self.recession_cm_per_hr == 0
+
+
+def compute_aoi_bounds(
+    stops: Dict[str, Stop],
+    charging_stations: List[ChargingStation],
+    depots: Dict[str, Depot],
+    margin_deg: float = AOI_MARGIN_DEG
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Bounding box (minlon, minlat, maxlon, maxlat) of all network assets plus a margin.
+    Buses only travel between these locations, so it covers every flood query.
+    Returns None if there are no assets.
+    """
+    locations = (
+        [stop.location for stop in stops.values()]
+        + [station.location for station in charging_stations]
+        + [depot.location for depot in depots.values()]
+    )
+    if not locations:
+        return None
+    lons = np.array([loc.lon for loc in locations], dtype=np.float64)
+    lats = np.array([loc.lat for loc in locations], dtype=np.float64)
+    return (
+        float(lons.min()) - margin_deg, float(lats.min()) - margin_deg,
+        float(lons.max()) + margin_deg, float(lats.max()) + margin_deg
+    )
+
 
 class FloodHazardMap:
     """Handles loading and querying flood depth from raster TIF files"""
     
-    def __init__(self, config: FloodHazardConfig):
+    def __init__(
+        self,
+        config: FloodHazardConfig,
+        aoi_bounds: Optional[Tuple[float, float, float, float]] = None
+    ):
+        """
+        Args:
+            config: Flood hazard configuration
+            aoi_bounds: Optional (minlon, minlat, maxlon, maxlat); only this part
+                        of the raster is read (see compute_aoi_bounds)
+        """
         self.config = config
+        self.aoi_bounds = aoi_bounds
         self.raster_data: Optional[np.ndarray] = None
         self.transform = None
         self.crs = None
         self.nodata_value = None
+        self._inv_transform: Optional[Tuple[float, ...]] = None  # (a, b, c, d, e, f) of ~transform
         self._t0: Optional[float] = None  # simulation start timestamp for dynamics
+        self._flood_index = None  # STRtree over wet raster blocks, see _build_flood_index()
+        self._fixed_depths: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # slot -> (xy, depths cm), latest only
         self._load_raster()
     
     def _load_raster(self):
@@ -84,13 +162,24 @@ class FloodHazardMap:
             return
         
         try:
-            with rasterio.open(flood_path) as src:
-                # Read first band and enforce non-negative (assumed cm units)
-                self.raster_data = np.maximum(src.read(1), 0)
-                self.transform = src.transform
-                self.crs = src.crs
-                self.nodata_value = src.nodata
-                
+            if not self._load_cached(flood_path):
+                with rasterio.open(flood_path) as src:
+                    window = self._aoi_window(src)
+                    # Read first band as float32 (ample precision for cm depths, half the bytes of
+                    # float64), zero out nodata cells and enforce non-negative (assumed cm units)
+                    band = src.read(1, window=window, out_dtype="float32", masked=True)
+                    self.raster_data = np.maximum(band.filled(0), 0, dtype=np.float32)
+                    # Transform of the window keeps (lon, lat) -> (row, col) consistent after cropping
+                    self.transform = src.transform if window is None else window_transform(window, src.transform)
+                    self.crs = src.crs
+                    self.nodata_value = src.nodata
+                self._save_cache(flood_path)
+
+            # Inverse affine (lon, lat) -> (col, row) as plain floats for vectorized sampling
+            inv = ~self.transform
+            self._inv_transform = (inv.a, inv.b, inv.c, inv.d, inv.e, inv.f)
+            self._flood_index = self._build_flood_index()
+
             print(f"✓ Loaded flood hazard map: {self.config.flood_map_file}")
             print(f"  - Shape: {self.raster_data.shape}")
             print(f"  - CRS: {self.crs}")
@@ -106,6 +195,71 @@ class FloodHazardMap:
             print("Flood hazard analysis disabled")
             self.raster_data = None
     
+    def _cache_paths(self, flood_path: Path) -> Tuple[Path, Path]:
+        """
+        Paths of the cached raster (.npy) and its metadata (.json) in output/.cache.
+        Keyed on FLOOD_CACHE_VERSION, the map file, its mtime and size, and the AOI bounds.
+        """
+        stat = flood_path.stat()
+        key = hashlib.sha1(
+            f"v{FLOOD_CACHE_VERSION}|{flood_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{self.aoi_bounds}".encode()
+        ).hexdigest()
+        cache_dir = output_path(".cache")
+        return cache_dir / f"flood_{key}.npy", cache_dir / f"flood_{key}.json"
+
+    def _load_cached(self, flood_path: Path) -> bool:
+        """Load raster and metadata from the cache (memory-mapped); returns False on a miss."""
+        npy_path, meta_path = self._cache_paths(flood_path)
+        if not (npy_path.exists() and meta_path.exists()):
+            return False
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.raster_data = np.load(npy_path, mmap_mode="r")
+            self.transform = Affine(*meta["transform"])
+            self.crs = CRS.from_wkt(meta["crs"]) if meta["crs"] else None
+            self.nodata_value = meta["nodata"]
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable flood map cache {npy_path.name}: {e}")
+            self.raster_data = None
+            return False
+        print(f"  Using cached flood raster {npy_path.name}")
+        return True
+
+    def _save_cache(self, flood_path: Path):
+        """Write the loaded raster and its metadata to the cache."""
+        npy_path, meta_path = self._cache_paths(flood_path)
+        try:
+            npy_path.parent.mkdir(exist_ok=True)
+            np.save(npy_path, self.raster_data)
+            with open(meta_path, "w") as f:
+                json.dump({
+                    "transform": list(self.transform)[:6],
+                    "crs": self.crs.to_wkt() if self.crs else None,
+                    "nodata": self.nodata_value
+                }, f)
+        except Exception as e:
+            print(f"Warning: Failed to cache flood map {flood_path.name}: {e}")
+            npy_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+
+    def _aoi_window(self, src) -> Optional[Window]:
+        """
+        Pixel window covering aoi_bounds, rounded outward to whole pixels and
+        clipped to the raster. None means read the full raster.
+        """
+        if self.aoi_bounds is None:
+            return None
+        window = from_bounds(*self.aoi_bounds, transform=src.transform)
+        col0 = max(0, math.floor(window.col_off))
+        row0 = max(0, math.floor(window.row_off))
+        col1 = min(src.width, math.ceil(window.col_off + window.width))
+        row1 = min(src.height, math.ceil(window.row_off + window.height))
+        if col1 <= col0 or row1 <= row0:
+            print("WARNING: Network area does not overlap the flood map; reading the full raster")
+            return None
+        return Window(col0, row0, col1 - col0, row1 - row0)
+
     def _base_depth_cm_at_point(self, lon: float, lat: float) -> float:
         """
         Get base flood depth from raster at a specific point (lon, lat) in centimeters.
@@ -139,6 +293,14 @@ class FloodHazardMap:
             # Silently return 0.0 for any errors (likely out of bounds)
             return 0.0
     
+    def _delta_cm(self, current_sim_time: float) -> float:
+        """Depth change (cm) from precipitation/recession since the first queried time."""
+        # Initialize start time on first call
+        if self._t0 is None:
+            self._t0 = current_sim_time
+        hours = max(0.0, (current_sim_time - self._t0) / 3600.0)
+        return (self.config.precipitation_cm_per_hr - self.config.recession_cm_per_hr) * hours
+
     def get_effective_depth_m(self, lon: float, lat: float, current_sim_time: Optional[float]) -> float:
         """
         Compute effective flood depth at (lon, lat) incorporating simple precipitation/recession dynamics.
@@ -149,14 +311,147 @@ class FloodHazardMap:
         base_cm = self._base_depth_cm_at_point(lon, lat)
         if current_sim_time is None:
             return base_cm / 100.0
-        # Initialize start time on first call
-        if self._t0 is None:
-            self._t0 = current_sim_time
-        hours = max(0.0, (current_sim_time - self._t0) / 3600.0)
-        delta_cm = (self.config.precipitation_cm_per_hr - self.config.recession_cm_per_hr) * hours
-        eff_cm = max(0.0, base_cm + delta_cm)
+        eff_cm = max(0.0, base_cm + self._delta_cm(current_sim_time))
         return eff_cm / 100.0
 
+    def _build_flood_index(self):
+        """
+        STRtree over the geographic boxes of raster blocks holding any positive depth.
+        Returns None when it would not prune anything (every block wet) or Shapely 2 is missing.
+        """
+        if STRtree is None:
+            return None
+        n_rows, n_cols = self.raster_data.shape
+        # Pad boxes by half a pixel so rounding never drops a point in a wet edge cell
+        pad_x, pad_y = abs(self.transform.a) / 2, abs(self.transform.e) / 2
+        boxes = []
+        n_blocks = 0
+        for r0 in range(0, n_rows, FLOOD_INDEX_BLOCK):
+            for c0 in range(0, n_cols, FLOOD_INDEX_BLOCK):
+                n_blocks += 1
+                r1, c1 = min(r0 + FLOOD_INDEX_BLOCK, n_rows), min(c0 + FLOOD_INDEX_BLOCK, n_cols)
+                if not (self.raster_data[r0:r1, c0:c1] > 0).any():
+                    continue
+                x0, y0 = self.transform * (c0, r0)
+                x1, y1 = self.transform * (c1, r1)
+                boxes.append(box(min(x0, x1) - pad_x, min(y0, y1) - pad_y, max(x0, x1) + pad_x, max(y0, y1) + pad_y))
+        if len(boxes) == n_blocks:
+            return None
+        return STRtree(boxes)
+
+    def get_effective_depths_cm(
+        self,
+        lons: np.ndarray,
+        lats: np.ndarray,
+        current_sim_time: Optional[float]
+    ) -> np.ndarray:
+        """
+        Vectorized effective flood depth for arrays of points, in centimeters (float64).
+        All points are mapped to raster cells with one affine transform and read
+        with a single fancy-index lookup; points outside every wet raster block
+        (see _build_flood_index) are not sampled.
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        base_cm = np.zeros(lons.shape, dtype=np.float64)
+
+        if self.raster_data is not None and self._inv_transform is not None:
+            if self._flood_index is None:
+                base_cm = self._sample_base_cm(lons, lats)
+            elif lons.size:
+                # Only points over wet blocks can have a positive base depth
+                candidates = np.unique(self._flood_index.query(points(lons, lats))[0])
+                base_cm[candidates] = self._sample_base_cm(lons[candidates], lats[candidates])
+
+        if current_sim_time is None or self.config.static_dynamics:
+            return base_cm
+        return np.maximum(0.0, base_cm + self._delta_cm(current_sim_time))
+
+    def get_effective_depths_m(
+        self,
+        lons: np.ndarray,
+        lats: np.ndarray,
+        current_sim_time: Optional[float]
+    ) -> np.ndarray:
+        """Vectorized get_effective_depth_m for arrays of points (see get_effective_depths_cm)."""
+        return self.get_effective_depths_cm(lons, lats, current_sim_time) / 100.0
+
+    def get_fixed_depths_cm(self, slot: str, xy: np.ndarray, current_sim_time: Optional[float]) -> np.ndarray:
+        """
+        get_effective_depths_cm for an (n, 2) array of fixed (lon, lat) points, e.g. infrastructure_xy().
+        With static dynamics the depths never change, so they are sampled once and reused while
+        slot (e.g. 'stops') keeps getting the same array object, which must not be modified in
+        place; a new array replaces the slot's entry.
+        """
+        if not self.config.static_dynamics:
+            return self.get_effective_depths_cm(xy[:, 0], xy[:, 1], current_sim_time)
+        cached = self._fixed_depths.get(slot)
+        if cached is None or cached[0] is not xy:
+            cached = (xy, self.get_effective_depths_cm(xy[:, 0], xy[:, 1], current_sim_time))
+            self._fixed_depths[slot] = cached
+        return cached[1]
+
+    def _sample_base_cm(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Base raster depth (cm) at each (lon, lat); 0 outside the raster and for nodata/NaN cells."""
+        base_cm = np.zeros(lons.shape, dtype=np.float64)
+        if NUMBA_AVAILABLE:
+            # Fused compiled loop (transform, bounds, lookup, masking), visiting points by raster row
+            d, e, f = self._inv_transform[3:]
+            order = np.argsort(d * lons + e * lats + f, kind="stable")
+            nodata = np.nan if self.nodata_value is None else float(self.nodata_value)
+            batch_sample_raster(
+                np.asarray(self.raster_data), np.array(self._inv_transform), lons, lats, order, nodata, base_cm
+            )
+        else:
+            a, b, c, d, e, f = self._inv_transform
+            cols = np.floor(a * lons + b * lats + c)
+            rows = np.floor(d * lons + e * lats + f)
+            n_rows, n_cols = self.raster_data.shape
+            # NaN coordinates compare False, so they count as out of bounds
+            in_bounds = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+            rows = np.where(in_bounds, rows, 0).astype(np.intp)
+            cols = np.where(in_bounds, cols, 0).astype(np.intp)
+
+            # Read cells in raster (row-major) order for memory locality, then scatter
+            # the values back to caller order
+            order = np.lexsort((cols, rows))
+            depths = np.empty(rows.shape, dtype=np.float64)
+            depths[order] = self.raster_data[rows[order], cols[order]]
+            valid = in_bounds & ~np.isnan(depths) & (depths > 0)
+            if self.nodata_value is not None:
+                valid &= depths != self.nodata_value
+            base_cm = np.where(valid, depths, 0.0)
+        return base_cm
+
+
+def _locations_xy(locations) -> np.ndarray:
+    """(n, 2) float64 array of (lon, lat) for a sequence of Locations."""
+    return np.array([(loc.lon, loc.lat) for loc in locations], dtype=np.float64).reshape(-1, 2)
+
+
+def infrastructure_xy(
+    routes: List[Route],
+    charging_stations: List[ChargingStation],
+    depots: Dict[str, Depot]
+) -> Dict[str, np.ndarray]:
+    """
+    (lon, lat) arrays of the fixed infrastructure, in the order detect_flood_impact samples it:
+    - 'stops': every stop position of every route, flattened in route order
+      ('stop_ids' holds their ids; route i owns route_offsets[i]:route_offsets[i + 1])
+    - 'stations': charging stations in list order
+    - 'depots': depots in dict order
+    These never change during a run, so callers can compute them once and reuse them.
+    """
+    route_stops = [stop for route in routes for stop in route.stops if stop is not None]
+    route_lengths = [sum(stop is not None for stop in route.stops) for route in routes]
+    return {
+        "stops": _locations_xy([stop.location for stop in route_stops]),
+        "stop_ids": np.array([stop.stop_id for stop in route_stops], dtype=object),
+        "route_offsets": np.concatenate([[0], np.cumsum(route_lengths, dtype=np.int64)]),
+        "stations": _locations_xy([station.location for station in charging_stations]),
+        "depots": _locations_xy([depot.location for depot in depots.values()])
+    }
+
 
 def detect_flood_impact(
     flood_map: FloodHazardMap,
@@ -165,10 +460,13 @@ def detect_flood_impact(
     charging_stations: List[ChargingStation],
     depots: Dict[str, Depot],
     buses: List['Bus'],
-    current_sim_time: float
+    current_sim_time: float,
+    static_xy: Optional[Dict[str, np.ndarray]] = None
 ) -> Tuple[List[DisruptionEvent], Set[str], Set[str], Set[str]]:
     """
     Check which network components are affected by flooding.
+    static_xy: Precomputed infrastructure_xy(routes, charging_stations, depots);
+               computed here if not given.
     
     Returns:
         - List of DisruptionEvents for affected routes
@@ -185,21 +483,37 @@ def detect_flood_impact(
     flooded_depots: Set[str] = set()
     flooded_buses: Set[str] = set()
     
+    # Depths stay in the raster's centimeters; only logged values are converted to meters
+    threshold = config.flood_depth_threshold_cm
+    if static_xy is None:
+        static_xy = infrastructure_xy(routes, charging_stations, depots)
+
+    def sample(xy: np.ndarray) -> np.ndarray:
+        """Effective depths (cm) for an (n, 2) array of (lon, lat), sampled in one batch."""
+        return flood_map.get_effective_depths_cm(xy[:, 0], xy[:, 1], current_sim_time)
+
+    def sample_fixed(slot: str) -> np.ndarray:
+        """sample() of static_xy[slot]; reused across steps when depths do not change."""
+        return flood_map.get_fixed_depths_cm(slot, static_xy[slot], current_sim_time)
+
     # 1. Check stops and create route disruptions
     if config.disrupt_routes or config.disrupt_stops:
         route_affected_stops: Dict[str, List[str]] = {}
-        
-        for route in routes:
-            affected_stop_ids = []
-            for stop in route.stops:
-                if stop is None:
-                    continue
-                
-                lon, lat = stop.location.lon, stop.location.lat
-                depth_m = flood_map.get_effective_depth_m(lon, lat, current_sim_time)
-                if depth_m >= config.flood_depth_threshold_m:
-                    affected_stop_ids.append(stop.stop_id)
-            
+
+        # All stop positions of all routes, flattened into one batch
+        stop_flooded = sample_fixed("stops") >= threshold
+
+        # Flooded stops per route from a prefix sum over the flat mask (empty routes count 0);
+        # only routes with flooded stops are visited in Python
+        offsets = static_xy["route_offsets"]
+        flooded_before = np.concatenate([[0], np.cumsum(stop_flooded)])
+        route_counts = flooded_before[offsets[1:]] - flooded_before[offsets[:-1]]
+
+        for r in np.nonzero(route_counts)[0]:
+            route = routes[r]
+            start, end = offsets[r], offsets[r + 1]
+            affected_stop_ids = static_xy["stop_ids"][start:end][stop_flooded[start:end]].tolist()
+
             if affected_stop_ids:
                 route_affected_stops[route.route_id] = affected_stop_ids
                 
@@ -212,64 +526,93 @@ def detect_flood_impact(
                     description=f"Flood disruption ({len(affected_stop_ids)} stops affected)"
                 )
                 disruptions.append(disruption)
-                print(f"  🌊 FLOOD: Route {route.name} — {len(affected_stop_ids)} stops flooded")
+                logger.debug("  🌊 FLOOD: Route %s — %d stops flooded", route.name, len(affected_stop_ids))
     
     # 2. Check charging stations
     if config.disrupt_charging_stations:
-        for station in charging_stations:
-            lon, lat = station.location.lon, station.location.lat
-            depth_m = flood_map.get_effective_depth_m(lon, lat, current_sim_time)
-            if depth_m >= config.flood_depth_threshold_m:
-                flooded_stations.add(station.name)
-                print(f"  🌊 FLOOD: Charging Station '{station.name}' (depth: {depth_m:.2f}m)")
+        station_depths = sample_fixed("stations")
+        for i in np.nonzero(station_depths >= threshold)[0]:
+            station = charging_stations[i]
+            flooded_stations.add(station.name)
+            logger.debug("  🌊 FLOOD: Charging Station '%s' (depth: %.2fm)", station.name, station_depths[i] / 100.0)
     
     # 3. Check depots
     if config.disrupt_depots:
-        for depot_name, depot in depots.items():
-            lon, lat = depot.location.lon, depot.location.lat
-            depth_m = flood_map.get_effective_depth_m(lon, lat, current_sim_time)
-            if depth_m >= config.flood_depth_threshold_m:
-                flooded_depots.add(depot_name)
-                print(f"  🌊 FLOOD: Depot '{depot_name}' (depth: {depth_m:.2f}m)")
+        depot_items = list(depots.items())
+        depot_depths = sample_fixed("depots")
+        for i in np.nonzero(depot_depths >= threshold)[0]:
+            depot_name = depot_items[i][0]
+            flooded_depots.add(depot_name)
+            logger.debug("  🌊 FLOOD: Depot '%s' (depth: %.2fm)", depot_name, depot_depths[i] / 100.0)
     
     # 4. Check buses at current locations
     if config.disrupt_buses:
-        for bus in buses:
-            if hasattr(bus, 'current_location') and bus.current_location:
-                lon, lat = bus.current_location.lon, bus.current_location.lat
-                depth_m = flood_map.get_effective_depth_m(lon, lat, current_sim_time)
-                if depth_m >= config.flood_depth_threshold_m:
-                    flooded_buses.add(bus.bus_id)
-                    print(f"  🌊 FLOOD: Bus '{bus.bus_id}' stranded (depth: {depth_m:.2f}m)")
+        located_buses = [bus for bus in buses if getattr(bus, 'current_location', None)]
+        bus_depths = sample(_locations_xy([bus.current_location for bus in located_buses]))
+        for i in np.nonzero(bus_depths >= threshold)[0]:
+            bus = located_buses[i]
+            flooded_buses.add(bus.bus_id)
+            logger.debug("  🌊 FLOOD: Bus '%s' stranded (depth: %.2fm)", bus.bus_id, bus_depths[i] / 100.0)
+
+    # One summary line per step; per-component details are logged at DEBUG level
+    if disruptions or flooded_stations or flooded_depots or flooded_buses:
+        n_stops = sum(len(d.affected_stop_ids) for d in disruptions)
+        print(f"  🌊 FLOOD: {len(disruptions)} routes ({n_stops} stops), {len(flooded_stations)} charging stations, "
+              f"{len(flooded_depots)} depots, {len(flooded_buses)} buses flooded")
     
     return disruptions, flooded_stations, flooded_depots, flooded_buses
 
 
+def station_positions(charging_stations: List[ChargingStation]) -> Dict[str, List[int]]:
+    """Station name -> positions in charging_stations (names may repeat)."""
+    positions: Dict[str, List[int]] = {}
+    for i, station in enumerate(charging_stations):
+        positions.setdefault(station.name, []).append(i)
+    return positions
+
+
 def apply_flood_impacts(
     charging_stations: List[ChargingStation],
     flooded_station_names: Set[str],
     buses: List['Bus'],
-    flooded_bus_ids: Set[str]
+    flooded_bus_ids: Set[str],
+    station_index: Optional[Dict[str, List[int]]] = None,
+    station_operational: Optional[np.ndarray] = None
 ) -> None:
     """
     Apply flood impacts to charging stations and buses.
     Modifies objects in place.
+    station_index / station_operational: Optional station_positions(charging_stations)
+        and a bool array of each station's current operational flag (updated in place).
+        With them, only stations whose flag changes are touched.
     """
     # Disable flooded charging stations
-    for station in charging_stations:
-        was_operational = station.operational
-        is_flooded = station.name in flooded_station_names
-        station.operational = not is_flooded
-        
-        # Optionally log status changes
-        if was_operational and is_flooded:
-            pass  # Already logged in detect_flood_impact
-        elif not was_operational and not is_flooded:
-            print(f"  ✓ Charging Station '{station.name}' restored")
+    if station_index is not None and station_operational is not None:
+        operational = np.ones(len(charging_stations), dtype=bool)
+        flooded_idx = [i for name in flooded_station_names for i in station_index.get(name, ())]
+        operational[flooded_idx] = False
+        for i in np.nonzero(operational != station_operational)[0]:
+            station = charging_stations[i]
+            station.operational = bool(operational[i])
+            if station.operational:
+                print(f"  ✓ Charging Station '{station.name}' restored")
+        station_operational[:] = operational
+    else:
+        for station in charging_stations:
+            was_operational = station.operational
+            is_flooded = station.name in flooded_station_names
+            station.operational = not is_flooded
+            
+            # Optionally log status changes
+            if was_operational and is_flooded:
+                pass  # Already logged in detect_flood_impact
+            elif not was_operational and not is_flooded:
+                print(f"  ✓ Charging Station '{station.name}' restored")
     
     # Strand flooded buses
-    for bus in buses:
-        if bus.bus_id in flooded_bus_ids:
-            if bus.status != "stranded":
-                bus.status = "stranded"
-                # Optionally: set SoC to 0 or apply other penalties
\ No newline at end of file
+    if flooded_bus_ids:
+        for bus in buses:
+            if bus.bus_id in flooded_bus_ids:
+                if bus.status != BusStatus.STRANDED:
+                    bus.status = BusStatus.STRANDED
+                    # Optionally: set SoC to 0 or apply other penalties
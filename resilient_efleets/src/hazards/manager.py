@@ -5,16 +5,20 @@ Tracks active disruptions, adds new ones, expires old ones.
 Supports both random disruptions and flood hazard-based disruptions.
 """
 
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
 
 from resilient_efleets.src.core.disruption import DisruptionEvent
 from resilient_efleets.src.core.charging import ChargingStation
+from resilient_efleets.src.simulation.event_log import event_log
 from resilient_efleets.src.hazards.random_disruption import generate_random_disruption
 from resilient_efleets.src.hazards.flood import (
     FloodHazardConfig,
     FloodHazardMap,
     detect_flood_impact,
+    infrastructure_xy,
+    station_positions,
     apply_flood_impacts
 )
 
@@ -23,7 +27,8 @@ class DisruptionManager:
     def __init__(
         self,
         flood_config: Optional[FloodHazardConfig] = None,
-        use_random_disruptions: bool = True
+        use_random_disruptions: bool = True,
+        aoi_bounds: Optional[Tuple[float, float, float, float]] = None
     ):
         """
         Initialize disruption manager.
@@ -32,8 +37,13 @@ class DisruptionManager:
             flood_config: Configuration for flood hazard-based disruptions.
                          If None, flood hazards are disabled.
             use_random_disruptions: Whether to generate random disruptions (default: True)
+            aoi_bounds: Optional (minlon, minlat, maxlon, maxlat) of the network;
+                        the flood raster is cropped to it on load
         """
         self.active_disruptions: List[DisruptionEvent] = []
+        # (route_id, stop_id) pairs affected by an active disruption, rebuilt by update()
+        self._active_pairs: FrozenSet[Tuple[str, str]] = frozenset()
+        self.changed = False  # Whether the last update() changed the disrupted stops or flooded stations
         self.use_random_disruptions = use_random_disruptions
         
         # Initialize flood hazard system
@@ -42,13 +52,22 @@ class DisruptionManager:
             flood_config = FloodHazardConfig(enabled=False)
         
         self.flood_config = flood_config
-        self.flood_map = FloodHazardMap(flood_config) if flood_config.enabled else None
+        self.flood_map = FloodHazardMap(flood_config, aoi_bounds) if flood_config.enabled else None
         
         # Track flooded components
         self._flooded_stations = set()
         self._flooded_depots = set()
         self._flooded_buses = set()
 
+        # Flood query coordinates of fixed infrastructure, reused across updates
+        self._cached_xy: Optional[Dict[str, np.ndarray]] = None
+        self._cached_xy_sources: Optional[tuple] = None
+
+        # Station name -> positions and current operational flags, for apply_flood_impacts
+        self._station_idx: Optional[Dict[str, List[int]]] = None
+        self._station_op: Optional[np.ndarray] = None
+        self._station_source: Optional[tuple] = None
+
     def update(
         self,
         routes,
@@ -66,6 +85,8 @@ class DisruptionManager:
         
         Returns updated list of charging stations (with possible operational changes)
         """
+        flooded_before = self._flooded_stations
+
         # 1. Expire old disruptions
         self.active_disruptions = [
             d for d in self.active_disruptions
@@ -87,18 +108,22 @@ class DisruptionManager:
                 charging_stations=charging_stations,
                 depots=depots,
                 buses=buses,
-                current_sim_time=current_sim_time
+                current_sim_time=current_sim_time,
+                static_xy=self._infrastructure_xy(routes, charging_stations, depots)
             )
             
             # Add flood disruptions
             self.active_disruptions.extend(new_flood_disruptions)
             
             # Apply flood impacts to infrastructure
+            self._sync_station_index(charging_stations)
             apply_flood_impacts(
                 charging_stations=charging_stations,
                 flooded_station_names=flooded_stations,
                 buses=buses,
-                flooded_bus_ids=flooded_buses
+                flooded_bus_ids=flooded_buses,
+                station_index=self._station_idx,
+                station_operational=self._station_op
             )
             
             # Track flooded components for monitoring
@@ -106,17 +131,48 @@ class DisruptionManager:
             self._flooded_depots = flooded_depots
             self._flooded_buses = flooded_buses
 
+        # 4. Lookup set for per-bus stop checks (every listed disruption has started and not ended)
+        active_pairs = frozenset(
+            (d.route_id, stop_id) for d in self.active_disruptions for stop_id in d.affected_stop_ids
+        )
+        self.changed = active_pairs != self._active_pairs or self._flooded_stations != flooded_before
+        self._active_pairs = active_pairs
+
         # Log active disruptions count if any changes
         if self.active_disruptions:
-            timestamp = datetime.fromtimestamp(current_sim_time).strftime('%H:%M:%S')
-            print(f"[{timestamp}] Active disruptions: {len(self.active_disruptions)}")
+            event_log.log(current_sim_time, "active_disruptions", None, len(self.active_disruptions))
 
         return charging_stations
 
+    def _infrastructure_xy(self, routes, charging_stations, depots) -> Dict[str, np.ndarray]:
+        """
+        Cached infrastructure_xy(); rebuilt only when one of the input collections
+        is replaced or changes length.
+        """
+        sources = (routes, charging_stations, depots)
+        lengths = tuple(len(source) for source in sources)
+        cached = self._cached_xy_sources
+        if cached is None or cached[1] != lengths or any(a is not b for a, b in zip(cached[0], sources)):
+            self._cached_xy = infrastructure_xy(routes, charging_stations, depots)
+            self._cached_xy_sources = (sources, lengths)
+        return self._cached_xy
+
+    def _sync_station_index(self, charging_stations):
+        """(Re)build the station index and operational flags when the station list is replaced or resized."""
+        source = self._station_source
+        if source is None or source[0] is not charging_stations or source[1] != len(charging_stations):
+            self._station_idx = station_positions(charging_stations)
+            self._station_op = np.array([s.operational for s in charging_stations], dtype=bool)
+            self._station_source = (charging_stations, len(charging_stations))
+
     def get_active_disruptions(self) -> List[DisruptionEvent]:
         """Get list of currently active disruption events"""
         return self.active_disruptions
     
+    def get_active_pairs(self) -> FrozenSet[Tuple[str, str]]:
+        """(route_id, stop_id) pairs disrupted as of the last update()"""
+        return self._active_pairs
+
     def get_flooded_components_summary(self) -> dict:
         """Get summary of currently flooded components"""
         return {
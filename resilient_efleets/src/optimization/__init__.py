@@ -1,5 +1,5 @@
 # src/optimization/__init__.py
-from .mip_model import optimize_network
+from .mip_model import optimize_network, MipModelCache
 from .decision_applier import apply_mip_decisions
 
-__all__ = ["optimize_network", "apply_mip_decisions"]
\ No newline at end of file
+__all__ = ["optimize_network", "MipModelCache", "apply_mip_decisions"]
\ No newline at end of file
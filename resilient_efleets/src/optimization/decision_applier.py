@@ -4,37 +4,50 @@ Safely apply MIP decisions to Bus objects.
 Handles infeasible cases gracefully.
 """
 
-from typing import Dict, List
-from resilient_efleets.src.fleet.bus import Bus
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+from resilient_efleets.src.fleet.bus import Bus, BusStatus
 from resilient_efleets.src.core.charging import ChargingStation
+from resilient_efleets.src.core.depot import Depot
+from resilient_efleets.src.core.route import Stop
+from resilient_efleets.src.simulation.event_log import event_log
 import time
 
+logger = logging.getLogger(__name__)
+
 def apply_mip_decisions(
     buses: List[Bus],
     mip_result: Dict,
     charging_stations: List[ChargingStation],
-    current_sim_time: float
+    current_sim_time: float,
+    buses_by_id: Optional[Dict[str, Bus]] = None
 ) -> None:
     """
     Apply the decisions returned by optimize_network().
     Only applies immediate (myopic) actions from the MIP.
+    With buses_by_id (bus_id → Bus over buses), only buses that have a decision are
+    visited, in decision order (the MIP emits them in fleet order).
     """
     decisions = mip_result.get("decisions", {})
     S_map = mip_result.get("S_map", {})
-    C_unique_map = mip_result.get("C_unique_map", {})
+    station_map = mip_result.get("C_unique_map", {})  # CS ID -> ChargingStation
 
-    # Map CS IDs back to actual ChargingStation objects
-    station_map = {cs_id: station for cs_id, station in C_unique_map.items()}
+    if buses_by_id is not None:
+        targets = ((buses_by_id.get(bus_id), decision) for bus_id, decision in decisions.items())
+    else:
+        targets = ((bus, decisions.get(bus.bus_id)) for bus in buses)
 
-    for bus in buses:
-        decision = decisions.get(bus.bus_id)
-        if not decision:
+    action_counts = Counter()
+    for bus, decision in targets:
+        if bus is None or not decision:
             # No decision from MIP → bus continues current behavior (handled in bus.step)
             continue
 
         action = decision["action"]
-        print(f"MIP → {bus.bus_id}: {action} "
-              f"({decision.get('target_node_id') or decision.get('station_id', '')})")
+        action_counts[action] += 1
+        logger.debug("MIP → %s: %s (%s)", bus.bus_id, action,
+                     decision.get('target_node_id') or decision.get('station_id', ''))
 
         if action == "charge":
             station_id = decision["station_id"]
@@ -49,20 +62,21 @@ def apply_mip_decisions(
                 charge_time_seconds = min(charge_time_hours * 3600, 3600)  # cap at 1 hour for safety
 
                 # Set charging parameters
-                bus.status = "charging"
+                bus.status = BusStatus.CHARGING
                 bus.charging_station = station
                 bus.charging_start_time = current_sim_time
                 bus.charging_end_time = current_sim_time + charge_time_seconds
                 bus.mip_decision = None  # Decision applied
 
-                print(f"  → Started charging at {station.name}, "
-                      f"expected end: {time.strftime('%H:%M:%S', time.localtime(bus.charging_end_time))}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  → Started charging at %s, expected end: %s", station.name,
+                                 time.strftime('%H:%M:%S', time.localtime(bus.charging_end_time)))
             else:
-                print(f"  → Charging station {station_id} unavailable → ignoring charge")
+                logger.debug("  → Charging station %s unavailable → ignoring charge", station_id)
                 bus.mip_decision = None
 
         elif action == "return_depot":
-            bus.status = "returning_to_depot"
+            bus.status = BusStatus.RETURNING_TO_DEPOT
             bus.target = bus.depot  # Optional: help navigation
             bus.mip_decision = None
 
@@ -71,52 +85,50 @@ def apply_mip_decisions(
             target_obj = S_map.get(target_id)
 
             if not target_obj:
-                print(f"  → Target node {target_id} not found in S_map → ignoring move")
+                logger.debug("  → Target node %s not found in S_map → ignoring move", target_id)
                 continue
 
             # Case 1: Target is a regular stop on the bus's current route
-            if bus.current_route and bus.current_route.stops:
-                # Safely get the expected stop class
-                expected_class = type(bus.current_route.stops[0]) if bus.current_route.stops else object
-
-                if isinstance(target_obj, expected_class):
-                    # Find the index of this stop in the route
-                    found = False
-                    for idx, stop in enumerate(bus.current_route.stops):
-                        if stop and stop.stop_id == target_id:
-                            bus.current_stop_index = idx
-                            bus.current_location = stop.location
-                            bus.status = "on_route"
-                            bus.target = stop
-                            found = True
-                            break
-                    if found:
-                        bus.mip_decision = None
-                        continue  # Successfully handled
+            if isinstance(target_obj, Stop) and bus.current_route is not None:
+                # Index of this stop in the route (precomputed stop_id -> position)
+                idx = bus.current_route.stop_index.get(target_id)
+                if idx is not None:
+                    stop = bus.current_route.stops[idx]
+                    bus.current_stop_index = idx
+                    bus.current_location = stop.location
+                    bus.status = BusStatus.ON_ROUTE
+                    bus.target = stop
+                    bus.mip_decision = None
+                    continue  # Successfully handled
 
             # Case 2: Target is a depot (return_depot might come as move if not caught earlier)
-            if target_id.startswith("Depot_"):
-                bus.status = "returning_to_depot"
+            if isinstance(target_obj, Depot):
+                bus.status = BusStatus.RETURNING_TO_DEPOT
                 bus.target = target_obj
                 bus.mip_decision = None
                 continue
 
             # Case 3: Target is a charging station (charge might come as move to CS)
-            if target_id.startswith("CS_"):
+            if isinstance(target_obj, ChargingStation):
                 station = station_map.get(target_id)
                 if station and station.is_available(bus.company):
                     bus.mip_decision = {"action": "charge", "station_id": target_id}
                     bus.charging_station = station
-                    bus.status = "heading_to_charger"
+                    bus.status = BusStatus.HEADING_TO_CHARGER
                 else:
-                    print(f"  → Charging station {target_id} unavailable → ignoring")
+                    logger.debug("  → Charging station %s unavailable → ignoring", target_id)
                 continue
 
             # Fallback: unknown target
-            print(f"  → Unknown or incompatible move target {target_id} → ignoring")
+            logger.debug("  → Unknown or incompatible move target %s → ignoring", target_id)
 
         else:
-            print(f"  → Unknown action {action} → ignoring")
+            logger.debug("  → Unknown action %s → ignoring", action)
 
         # If we reach here, decision was not fully applied
-        # bus.mip_decision remains set so bus.step() can handle it if needed
\ No newline at end of file
+        # bus.mip_decision remains set so bus.step() can handle it if needed
+
+    # One summary line per call, deferred like the engine's step messages; per-bus details are logged at DEBUG level
+    if action_counts:
+        event_log.log(current_sim_time, "mip_decisions", None,
+                      ", ".join(f"{n} {action}" for action, n in action_counts.items()))
\ No newline at end of file
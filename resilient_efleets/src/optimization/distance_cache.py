@@ -1,11 +1,18 @@
 # src/optimization/distance_cache.py
 
-import json
 import os
-from geopy.distance import geodesic
-from typing import Dict, Set, Tuple
+import numpy as np
+from typing import Dict, List, Set, Tuple
+
+from resilient_efleets.src.core.kernels import NUMBA_AVAILABLE, EARTH_RADIUS_KM, batch_haversine_km
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
 
-CACHE_FILE = "distance_matrix_cache.json"
+# Edge endpoints and distances stored as parallel arrays (ids as fixed-width strings, km as float32)
+CACHE_FILE = "distance_matrix_cache.npz"
 
 def compute_and_cache_distances(
     S_map: Dict[str, object],
@@ -17,35 +24,122 @@ def compute_and_cache_distances(
     """
     cache_path = os.path.join(cache_dir, CACHE_FILE)
     
-    dist_matrix = {}
     print(f"Precomputing {len(feasible_edges)} distances (this may take 10-60 seconds first time)...")
-    
-    count = 0
-    for s1, s2 in feasible_edges:
-        if s1 == s2:
-            dist_matrix[(s1, s2)] = 0.0
-            continue
-        try:
-            coord1 = S_map[s1].geometry.coords[0][::-1]  # (lat, lon)
-            coord2 = S_map[s2].geometry.coords[0][::-1]
-            # dist_matrix[(s1, s2)] = geodesic(coord1, coord2).meters / 1000  # km
-            dist_matrix[(s1, s2)] = haversine_km(coord1, coord2)
-        except Exception as e:
-            print(f"Warning: Distance failed {s1}->{s2}: {e}")
-            dist_matrix[(s1, s2)] = 0.0
-        count += 1
-        if count % 500 == 0:
-            print(f"  Progress: {count}/{len(feasible_edges)}")
-    
+
+    edges = list(feasible_edges)
+    km = edge_distances_km(S_map, edges)
+
+    dist_matrix = dict(zip(edges, km.tolist()))
+
     # Save to cache
-    serializable = {f"{k[0]}|{k[1]}": v for k, v in dist_matrix.items()}
-    with open(cache_path, "w") as f:
-        json.dump(serializable, f)
+    np.savez(
+        cache_path,
+        a=np.array([s1 for s1, _ in edges], dtype=str),
+        b=np.array([s2 for _, s2 in edges], dtype=str),
+        d=km
+    )
     print(f"Distance matrix cached to {cache_path}")
     
     return dist_matrix
 
-import numpy as np
+def edge_distances_km(S_map: Dict[str, object], edges: List[Tuple[str, str]]) -> np.ndarray:
+    """
+    Haversine length (km, float32) of each edge, aligned with edges.
+    Node coordinates are gathered once into arrays and all edges are evaluated in one
+    vectorized call. Self-loops are 0; edges touching a node without coordinates fall back to 0.
+    """
+    node_ids = list({s for edge in edges for s in edge})
+    node_idx = {s: i for i, s in enumerate(node_ids)}
+    lats, lons = _node_coords(S_map, node_ids)
+
+    idx_a = np.fromiter((node_idx[s1] for s1, _ in edges), dtype=np.intp, count=len(edges))
+    idx_b = np.fromiter((node_idx[s2] for _, s2 in edges), dtype=np.intp, count=len(edges))
+    km = haversine_km_batch(lats[idx_a], lons[idx_a], lats[idx_b], lons[idx_b])
+
+    km[idx_a == idx_b] = 0.0
+    for i in np.nonzero(np.isnan(km))[0]:
+        print(f"Warning: Distance failed {edges[i][0]}->{edges[i][1]}: no coordinates")
+    # float32 so a fresh computation and a cache load give identical distances
+    return np.nan_to_num(km, nan=0.0).astype(np.float32)
+
+
+def nearby_targets(
+    S_map: Dict[str, object],
+    source_ids: List[str],
+    target_ids: List[str],
+    radius_km: float,
+    min_targets: int
+) -> Dict[str, List[str]]:
+    """
+    For each source node, the target nodes within radius_km (great-circle), always
+    including its min_targets nearest so no source is left without a candidate.
+    Uses a cKDTree over unit-sphere points when scipy is installed, otherwise one
+    vectorized distance matrix. Nodes without coordinates are never filtered out.
+    """
+    if not source_ids or not target_ids:
+        return {s: list(target_ids) for s in source_ids}
+    src_lat, src_lon = _node_coords(S_map, source_ids)
+    tgt_lat, tgt_lon = _node_coords(S_map, target_ids)
+    src_ok = ~(np.isnan(src_lat) | np.isnan(src_lon))
+    tgt_missing = np.isnan(tgt_lat) | np.isnan(tgt_lon)
+    tgt_ok = np.flatnonzero(~tgt_missing)
+    always = set(np.flatnonzero(tgt_missing).tolist())
+    k = min(min_targets, len(tgt_ok))
+
+    result = {s: list(target_ids) for s, ok in zip(source_ids, src_ok) if not ok}
+    src_idx = np.flatnonzero(src_ok)
+    if len(src_idx) == 0 or len(tgt_ok) == 0:
+        return {s: result.get(s, list(target_ids)) for s in source_ids}
+
+    if cKDTree is not None:
+        # Chord length on the unit sphere is monotonic in great-circle distance
+        src_xyz = _unit_xyz(src_lat[src_idx], src_lon[src_idx])
+        tree = cKDTree(_unit_xyz(tgt_lat[tgt_ok], tgt_lon[tgt_ok]))
+        chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+        within = tree.query_ball_point(src_xyz, r=chord)
+        nearest = tree.query(src_xyz, k=k)[1].reshape(len(src_idx), -1) if k else np.empty((len(src_idx), 0), int)
+        picked = [set(w) | set(n.tolist()) for w, n in zip(within, nearest)]
+    else:
+        n_t = len(tgt_ok)
+        dist = haversine_km_batch(
+            np.repeat(src_lat[src_idx], n_t), np.repeat(src_lon[src_idx], n_t),
+            np.tile(tgt_lat[tgt_ok], len(src_idx)), np.tile(tgt_lon[tgt_ok], len(src_idx))
+        ).reshape(len(src_idx), n_t)
+        nearest = np.argsort(dist, axis=1, kind="stable")[:, :k]
+        picked = [set(np.flatnonzero(row <= radius_km).tolist()) | set(n.tolist()) for row, n in zip(dist, nearest)]
+
+    for i, chosen in zip(src_idx, picked):
+        keep = {int(tgt_ok[j]) for j in chosen} | always
+        result[source_ids[i]] = [target_ids[j] for j in sorted(keep)]
+    return {s: result[s] for s in source_ids}
+
+
+def _unit_xyz(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """(lat, lon) in degrees to points on the unit sphere."""
+    lat, lon = np.radians(lats), np.radians(lons)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def _node_coords(S_map: Dict[str, object], node_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Latitude and longitude arrays (degrees) for node_ids; NaN where a node has no usable geometry.
+    Reads the plain Location of stops, depots and stations; only other node types
+    go through a shapely geometry.
+    """
+    lats = np.full(len(node_ids), np.nan)
+    lons = np.full(len(node_ids), np.nan)
+    for i, s in enumerate(node_ids):
+        try:
+            node = S_map[s]
+            location = getattr(node, "location", None)
+            if location is not None:
+                lats[i], lons[i] = location.lat, location.lon
+            else:
+                lons[i], lats[i] = node.geometry.coords[0]  # shapely (lon, lat)
+        except Exception:
+            pass
+    return lats, lons
+
 
 def haversine_km(coord1, coord2):
     lat1, lon1 = np.radians(coord1)
@@ -55,7 +149,19 @@ def haversine_km(coord1, coord2):
     a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
     c = 2 * np.arcsin(np.sqrt(a))
     return 6371 * c  # Earth radius in km
-    
+
+
+def haversine_km_batch(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Element-wise haversine distance (km) between arrays of (lat, lon) points in degrees."""
+    if NUMBA_AVAILABLE:
+        # Fused, multithreaded compiled loop: no temporaries
+        lat1, lon1, lat2, lon2 = (np.ascontiguousarray(arr, dtype=np.float64) for arr in (lat1, lon1, lat2, lon2))
+        return batch_haversine_km(lat1, lon1, lat2, lon2, np.empty_like(lat1))
+    lat1, lon1, lat2, lon2 = np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 6371 * 2 * np.arcsin(np.sqrt(a))
+
+
 def load_cached_distances(
     S_map: Dict[str, object],
     feasible_edges: Set[Tuple[str, str]],
@@ -69,21 +175,16 @@ def load_cached_distances(
         return None
     
     try:
-        with open(cache_path, "r") as f:
-            data = json.load(f)
-        
+        with np.load(cache_path) as data:
+            a_ids, b_ids, dists = data["a"].tolist(), data["b"].tolist(), data["d"].tolist()
+        dist_matrix = dict(zip(zip(a_ids, b_ids), dists))
+
         # Validate: check if all current feasible edges are in cache
-        missing = []
-        for s1, s2 in feasible_edges:
-            key = f"{s1}|{s2}"
-            if key not in data:
-                missing.append((s1, s2))
-        
+        missing = feasible_edges - dist_matrix.keys()
         if missing:
             print(f"Cache outdated: missing {len(missing)} edges. Recomputing...")
             return None
-        
-        dist_matrix = {tuple(k.split("|")): float(v) for k, v in data.items()}
+
         print(f"Loaded distance matrix from cache ({len(dist_matrix)} entries)")
         return dist_matrix
     
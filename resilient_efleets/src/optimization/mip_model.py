@@ -1,27 +1,74 @@
 # src/optimization/mip_model.py
 
 import time
-from typing import List, Dict, Any
+import numpy as np
+from collections import defaultdict
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set, Tuple
 from pulp import (
-    LpProblem, LpMinimize, LpVariable, lpSum, LpBinary, LpStatus, value,
-    PULP_CBC_CMD, GUROBI, LpInteger
+    LpProblem, LpMinimize, LpVariable, LpAffineExpression, lpSum, LpBinary, LpContinuous, LpStatus, value,
+    PULP_CBC_CMD, HiGHS_CMD, LpInteger
 )
 
+try:
+    import gurobipy as gp
+    from gurobipy import GRB
+    GUROBIPY_AVAILABLE = True
+except ImportError:
+    gp = GRB = None
+    GUROBIPY_AVAILABLE = False
 
-from geopy.distance import geodesic
+try:
+    import scipy.sparse as sp
+except ImportError:
+    sp = None
 
-from resilient_efleets.src.core.route import Route, Stop
+from resilient_efleets.src.core.route import Route
 from resilient_efleets.src.core.charging import ChargingStation
 from resilient_efleets.src.core.depot import Depot
-from resilient_efleets.src.fleet.bus import Bus
+from resilient_efleets.src.fleet.bus import Bus, BusStatus
 from resilient_efleets.src.core.disruption import DisruptionEvent
+from resilient_efleets.src.core.kernels import NUMBA_AVAILABLE, soc_dynamics_csr
 from resilient_efleets.src.config.settings import SimulationSettings
+from resilient_efleets.src.optimization.distance_cache import nearby_targets
 
 
 # -----------------------------
 # Solver Selection (Easy Switch)
 # -----------------------------
-USE_GUROBI = True  # Set to False to fall back to CBC
+USE_GUROBI = True  # Set to False to fall back to PuLP
+# With Gurobi the model is built directly in gurobipy (C-level addVars/addConstrs);
+# PuLP is only used for the fallback.
+PULP_SOLVER = "highs"  # PuLP fallback: "highs" (HiGHS_CMD, when the highs binary is installed) or "cbc"
+
+# Gurobi parameters for every solve, plus extras for repeat solves that start from the
+# previous solution. The extras are dropped again (Gurobi defaults) after a solve hits
+# the time limit.
+GUROBI_PARAMS = {"Presolve": 1, "Cuts": 1, "MIPFocus": 1}
+GUROBI_REPEAT_PARAMS = {"Method": 2, "Heuristics": 0.05}
+# Share of MIP_TIME_LIMIT_SECONDS the no-relaxation heuristic may spend looking for a first
+# incumbent before the root relaxation; the rest stays with branch-and-bound
+GUROBI_NO_REL_HEUR_FRACTION = 0.2
+
+
+@dataclass
+class MipInputs:
+    """Solver-independent data for one optimize_network call."""
+    buses: List[Bus]
+    S_map: Dict[str, object]
+    C_unique_map: Dict[str, ChargingStation]
+    S_ids: List[str]
+    stop_ids: List[str]               # regular stops in S_ids
+    C_ids: List[str]
+    edge_list: List[Tuple[str, str]]
+    edge_km: List[float]              # aligned with edge_list
+    out_edges: Dict[str, List[int]]   # node -> indices into edge_list leaving it
+    in_edges: Dict[str, List[int]]    # node -> indices into edge_list entering it
+    start_nodes: Dict[str, Optional[str]]  # bus_id -> node at t=0 (None if unknown)
+    reach: Dict[str, List[List[str]]]  # bus_id -> nodes reachable at each minute (S_ids order)
+    horizon_min: int
+    unserved_cost: float
 
 
 def build_node_maps_and_feasible_edges(
@@ -32,11 +79,15 @@ def build_node_maps_and_feasible_edges(
 ) -> tuple:
     """
     Build nodes and feasible edges, respecting current disruptions.
+    Node ids are also returned by category (stops, depots; chargers are the
+    C_unique_map keys), collected while inserting them, with station_to_id
+    mapping id(station) to its charger node id.
     """
     S_map = {}
     C_unique_map = {}
     disrupted_stop_ids = set()
-    disrupted_cs_names = set()
+    # Non-operational (e.g. flooded) stations get no node, so no charging variables
+    disrupted_cs_names = {station.name for station in charging_stations if not station.operational}
     disrupted_edges = set()  # (from_id, to_id)
 
     # Extract disruption info
@@ -45,11 +96,13 @@ def build_node_maps_and_feasible_edges(
         for stop_id in disruption.affected_stop_ids:
             disrupted_stop_ids.add(stop_id)
 
-    # Regular stops (exclude disrupted)
+    # Regular stops (exclude disrupted: without a node no variable can visit them)
+    stop_ids = []
     for route in routes:
         for stop in route.stops:
             if stop and stop.stop_id not in S_map and stop.stop_id not in disrupted_stop_ids:
                 S_map[stop.stop_id] = stop
+                stop_ids.append(stop.stop_id)
 
     # Depots
     depot_ids = []
@@ -58,17 +111,18 @@ def build_node_maps_and_feasible_edges(
         S_map[depot_id] = depot
         depot_ids.append(depot_id)
 
-    # Charging stations (exclude fully disrupted)
-    cs_idx = 0
-    for station in charging_stations:
+    # Charging stations (exclude fully disrupted and non-operational)
+    # Numbered by position in the full station list, so ids stay stable (and match the
+    # engine's station map) while stations go down and come back
+    station_to_id = {}
+    for cs_idx, station in enumerate(charging_stations):
         if station.name in disrupted_cs_names:
             continue  # fully unavailable
         cs_id = f"CS_{station.name}_{cs_idx}"
         S_map[cs_id] = station
         C_unique_map[cs_id] = station
-        cs_idx += 1
+        station_to_id.setdefault(id(station), cs_id)
 
-    S_ids = list(S_map.keys())
     C_ids = list(C_unique_map.keys())
 
     # Feasible edges (respect road blocks)
@@ -79,33 +133,314 @@ def build_node_maps_and_feasible_edges(
         for i in range(len(route.stops) - 1):
             s1 = route.stops[i].stop_id if route.stops[i] else None
             s2 = route.stops[i + 1].stop_id if route.stops[i + 1] else None
-            if s1 in S_ids and s2 in S_ids and (s1, s2) not in disrupted_edges:
+            if s1 in S_map and s2 in S_map and (s1, s2) not in disrupted_edges:
                 feasible_edges.add((s1, s2))
 
-    # Any non-CS node → charging station
-    non_cs_nodes = [s for s in S_ids if not s.startswith("CS_")]
+    # Any non-CS node → charging station in range (plus the nearest few)
+    radius_km = SimulationSettings.MIP_CHARGER_RADIUS_KM
+    min_candidates = SimulationSettings.MIP_MIN_EDGE_CANDIDATES
+    non_cs_nodes = stop_ids + depot_ids
+    near_cs = nearby_targets(S_map, non_cs_nodes, C_ids, radius_km, min_candidates)
     for s in non_cs_nodes:
-        for c in C_ids:
+        for c in near_cs[s]:
             feasible_edges.add((s, c))
 
-    # Charging station → depot
+    # Charging station → depot in range (plus the nearest few)
+    near_depot = nearby_targets(S_map, C_ids, depot_ids, radius_km, min_candidates)
     for c in C_ids:
-        for d in depot_ids:
+        for d in near_depot[c]:
             feasible_edges.add((c, d))
 
     # Depot → first stop of any route
     for d in depot_ids:
         for route in routes:
-            if route.stops and route.stops[0] and route.stops[0].stop_id in S_ids:
+            if route.stops and route.stops[0] and route.stops[0].stop_id in S_map:
                 feasible_edges.add((d, route.stops[0].stop_id))
 
     # Any regular stop → depot (early return)
-    regular_stops = [s for s in S_ids if isinstance(S_map[s], Stop)]
-    for s in regular_stops:
+    for s in stop_ids:
         for d in depot_ids:
             feasible_edges.add((s, d))
 
-    return S_map, C_unique_map, feasible_edges, depot_ids, disrupted_stop_ids
+    return S_map, C_unique_map, feasible_edges, stop_ids, depot_ids, disrupted_stop_ids, station_to_id
+
+
+def _initial_node(bus: Bus, S_set: Set[str], station_to_id: Dict[int, str]) -> Optional[str]:
+    """Node a bus occupies at t=0, or None if it cannot be placed in the network."""
+    current_node = None
+    if bus.status == BusStatus.ON_ROUTE and bus.current_route and bus.current_stop_index > 0:
+        prev_stop = bus.current_route.stops[bus.current_stop_index - 1]
+        if prev_stop and prev_stop.stop_id in S_set:
+            current_node = prev_stop.stop_id
+    elif bus.status in (BusStatus.IN_DEPOT, BusStatus.IDLE, BusStatus.RETURNING_TO_DEPOT):
+        current_node = f"Depot_{bus.depot.name}"
+    elif bus.status == BusStatus.CHARGING and bus.charging_station:
+        current_node = station_to_id.get(id(bus.charging_station))
+
+    return current_node if current_node in S_set else None
+
+
+def _reachable_nodes(
+    start: Optional[str],
+    S_ids: List[str],
+    edge_list: List[Tuple[str, str]],
+    out_edges: Dict[str, List[int]],
+    horizon_min: int
+) -> List[List[str]]:
+    """
+    Nodes a bus can occupy at each minute 0..horizon_min, in S_ids order.
+    Presence only propagates along edges (charging ends a path in this model), so flow
+    conservation forces every x/y cell outside this set to 0 and it need not be created.
+    A bus without a known start node can be anywhere.
+    """
+    if start is None:
+        return [S_ids] * (horizon_min + 1)
+    reach = [[start]]
+    frontier = {start}
+    for _ in range(horizon_min):
+        frontier = {edge_list[k][1] for s in frontier for k in out_edges[s]}
+        reach.append([s for s in S_ids if s in frontier])
+    return reach
+
+
+@dataclass
+class _VarLayout:
+    """x/y/charge variable keys in creation order, with the integer attributes used for matrix assembly."""
+    x_keys: List[tuple]
+    x_t: np.ndarray
+    y_keys: List[tuple]
+    y_bus: np.ndarray   # bus position in inputs.buses
+    y_t: np.ndarray
+    y_edge: np.ndarray  # index into edge_list
+    y_src: np.ndarray   # x index of the cell the move leaves (b, s1, t)
+    y_dst: np.ndarray   # x index of the cell it enters (b, s2, t + 1)
+    ch_keys: List[tuple]
+    ch_bus: np.ndarray
+    ch_t: np.ndarray
+    ch_cs: np.ndarray   # index into C_ids
+    ch_x: np.ndarray    # x index of the charging cell
+
+
+def _var_layout(inputs: MipInputs) -> _VarLayout:
+    """
+    Variables only for (node, minute) cells each bus can reach; charging cells only
+    at chargers compatible with the bus's company.
+    """
+    edge_list, out_edges, reach = inputs.edge_list, inputs.out_edges, inputs.reach
+    T = range(inputs.horizon_min + 1)
+    cs_pos = {c: i for i, c in enumerate(inputs.C_ids)}
+    usable_by_company: Dict[str, Dict[str, int]] = {}
+    x_keys, y_keys, y_attrs, ch_keys, ch_attrs = [], [], [], [], []
+    for bi, bus in enumerate(inputs.buses):
+        b = bus.bus_id
+        usable = usable_by_company.get(bus.company)
+        if usable is None:
+            usable = usable_by_company[bus.company] = {
+                c: i for c, i in cs_pos.items() if bus.company in inputs.C_unique_map[c].compatible_companies
+            }
+        for t in T:
+            for s in reach[b][t]:
+                x_keys.append((b, s, t))
+                if s in usable:
+                    ch_keys.append((b, s, t))
+                    ch_attrs.append((bi, t, usable[s]))
+                if t < inputs.horizon_min:
+                    for k in out_edges[s]:
+                        y_keys.append((b, s, edge_list[k][1], t))
+                        y_attrs.append((bi, t, k))
+    x_index = {key: i for i, key in enumerate(x_keys)}
+    y_attrs = np.array(y_attrs, dtype=np.int64).reshape(-1, 3)
+    ch_attrs = np.array(ch_attrs, dtype=np.int64).reshape(-1, 3)
+    return _VarLayout(
+        x_keys=x_keys,
+        x_t=np.fromiter((t for _, _, t in x_keys), dtype=np.int64, count=len(x_keys)),
+        y_keys=y_keys,
+        y_bus=y_attrs[:, 0].copy(), y_t=y_attrs[:, 1].copy(), y_edge=y_attrs[:, 2].copy(),
+        y_src=np.fromiter((x_index[(b, s1, t)] for b, s1, _, t in y_keys), dtype=np.int64, count=len(y_keys)),
+        y_dst=np.fromiter((x_index[(b, s2, t + 1)] for b, _, s2, t in y_keys), dtype=np.int64, count=len(y_keys)),
+        ch_keys=ch_keys,
+        ch_bus=ch_attrs[:, 0].copy(), ch_t=ch_attrs[:, 1].copy(), ch_cs=ch_attrs[:, 2].copy(),
+        ch_x=np.fromiter((x_index[key] for key in ch_keys), dtype=np.int64, count=len(ch_keys))
+    )
+
+
+def _csr_from_triplets(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, n_rows: int):
+    """(indptr, indices, data) of COO triplets, keeping their order within each row."""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_rows))
+    return indptr, cols[order], vals[order]
+
+
+def _flow_rows(layout: _VarLayout, horizon: int):
+    """
+    Flow conservation as CSR arrays over columns x, then y, then charge (layout order):
+    for every cell with t < horizon, moves out + charging there - x == 0;
+    for every cell with t >= 1, x - moves in == 0.
+    """
+    n_x, n_y = len(layout.x_keys), len(layout.y_keys)
+    has_out = layout.x_t < horizon
+    has_in = layout.x_t >= 1
+    n_out = int(has_out.sum())
+    out_row = np.full(n_x, -1, dtype=np.int64)
+    out_row[has_out] = np.arange(n_out)
+    in_row = np.full(n_x, -1, dtype=np.int64)
+    in_row[has_in] = n_out + np.arange(int(has_in.sum()))
+    charging = layout.ch_t < horizon
+    y_cols = n_x + np.arange(n_y)
+
+    rows = np.concatenate((out_row[has_out], out_row[layout.y_src], out_row[layout.ch_x[charging]],
+                           in_row[has_in], in_row[layout.y_dst]))
+    cols = np.concatenate((np.flatnonzero(has_out), y_cols, n_x + n_y + np.flatnonzero(charging),
+                           np.flatnonzero(has_in), y_cols))
+    vals = np.concatenate((np.full(n_out, -1.0), np.ones(n_y), np.ones(int(charging.sum())),
+                           np.ones(int(has_in.sum())), np.full(n_y, -1.0)))
+    return _csr_from_triplets(rows, cols, vals, n_out + int(has_in.sum()))
+
+
+def _soc_dynamics_rows(inputs: MipInputs, layout: _VarLayout):
+    """
+    SOC dynamics as CSR arrays (see kernels.soc_dynamics_csr): one row per (bus, minute),
+    discharging 0.1% per km driven and charging at the station's power per minute.
+    Columns: soc (bus-major), then y, then charge_amt variables in layout order.
+    """
+    n_bus, horizon = len(inputs.buses), inputs.horizon_min
+    y_coef = 0.1 * np.asarray(inputs.edge_km, dtype=np.float64)[layout.y_edge]  # 0.1% per km
+    kw = np.array([inputs.C_unique_map[c].capacity_kw for c in inputs.C_ids], dtype=np.float64)
+    gain_scale = np.array([(60 / 3600) / (b.battery_capacity_kwh / 100) for b in inputs.buses], dtype=np.float64)
+    ch_coef = kw[layout.ch_cs] * gain_scale[layout.ch_bus]  # SOC % per minute of charging
+    if NUMBA_AVAILABLE:
+        return soc_dynamics_csr(n_bus, horizon, layout.y_bus, layout.y_t, y_coef,
+                                layout.ch_bus, layout.ch_t, ch_coef)
+
+    # Same rows via a stable sort of the concatenated triplets
+    soc_rows = np.arange(n_bus * horizon)
+    soc_cols = (soc_rows // horizon) * (horizon + 1) + soc_rows % horizon
+    in_horizon = layout.ch_t < horizon
+    y_offset = n_bus * (horizon + 1)
+    ch_offset = y_offset + len(layout.y_keys)
+    rows = np.concatenate((soc_rows, soc_rows, layout.y_bus * horizon + layout.y_t,
+                           (layout.ch_bus * horizon + layout.ch_t)[in_horizon]))
+    cols = np.concatenate((soc_cols, soc_cols + 1, y_offset + np.arange(len(layout.y_keys)),
+                           ch_offset + np.flatnonzero(in_horizon)))
+    vals = np.concatenate((np.full(soc_rows.size, -1.0), np.ones(soc_rows.size), y_coef, -ch_coef[in_horizon]))
+    return _csr_from_triplets(rows, cols, vals, n_bus * horizon)
+
+
+def _immediate_decisions(inputs: MipInputs, charge, y, var_value) -> Dict[str, Dict[str, str]]:
+    """
+    Decision per bus from a solved model: charging at t=0, else its first move (t=0→t=1),
+    taking the first charger (C_ids order) or edge (edge_list order) that is set.
+    Only the variables of the cells the bus can occupy at t=0 are read.
+    """
+    edge_list, out_edges = inputs.edge_list, inputs.out_edges
+    decisions = {}
+    for bus in inputs.buses:
+        b = bus.bus_id
+        start_cells = inputs.reach[b][0]
+        decision = None
+
+        # Charging now? (chargers appear in S_ids, and so in reach, in C_ids order)
+        for s in start_cells:
+            if (b, s, 0) in charge and var_value(charge[(b, s, 0)]) > 0.5:
+                decision = {"action": "charge", "station_id": s}
+                break
+
+        # Moving next?
+        if not decision:
+            k = min((k for s in start_cells for k in out_edges[s]
+                     if var_value(y[(b, s, edge_list[k][1], 0)]) > 0.5), default=None)
+            if k is not None:
+                decision = _move_decision(edge_list[k][1])
+
+        if decision:
+            decisions[b] = decision
+    return decisions
+
+
+def _move_decision(s2: str) -> Dict[str, str]:
+    """Decision dict for a bus whose first move is onto node s2."""
+    if s2.startswith("Depot_"):
+        return {"action": "return_depot", "target": s2}
+    if s2.startswith("CS_"):
+        return {"action": "charge", "station_id": s2}
+    return {"action": "move", "target_node_id": s2}
+
+
+@dataclass
+class _Network:
+    """Nodes, feasible edges and edge lengths of one optimize_network network; independent of bus state."""
+    S_map: Dict[str, object]
+    C_unique_map: Dict[str, ChargingStation]
+    S_ids: List[str]
+    S_set: Set[str]
+    stop_ids: List[str]
+    C_ids: List[str]
+    station_to_id: Dict[int, str]
+    feasible_edges: Set[Tuple[str, str]]
+    edge_list: List[Tuple[str, str]]
+    edge_km: List[float]              # aligned with edge_list
+    out_edges: Dict[str, List[int]]
+    in_edges: Dict[str, List[int]]
+
+
+def _build_network(
+    routes: List[Route],
+    charging_stations: List[ChargingStation],
+    depots: List[Depot],
+    active_disruptions: List[DisruptionEvent]
+) -> _Network:
+    """Build the node maps and feasible edges and look up the edge lengths (distance cache file first)."""
+    S_map, C_unique_map, feasible_edges, stop_ids, depot_ids, disrupted_stop_ids, station_to_id = build_node_maps_and_feasible_edges(
+        routes, charging_stations, depots, active_disruptions
+    )
+    S_ids = list(S_map.keys())
+    C_ids = list(C_unique_map.keys())
+    edge_list = list(feasible_edges)
+    edge_km: List[float] = []
+
+    if S_ids:
+        # Distance matrix: try cache first, compute once if needed
+        from resilient_efleets.src.optimization.distance_cache import (
+            load_cached_distances, compute_and_cache_distances
+        )
+
+        cached_dist = load_cached_distances(S_map, feasible_edges)
+        if cached_dist is not None:
+            dist_matrix = cached_dist
+        else:
+            dist_matrix = compute_and_cache_distances(S_map, feasible_edges)
+
+        print(f"Using distance matrix with {len(dist_matrix)} entries")
+
+        # Dense float32 distance array over integer node ids (inf = no feasible edge);
+        # per-edge lengths are gathered once, aligned with edge_list
+        node_idx = {s: i for i, s in enumerate(S_ids)}
+        edge_a = np.fromiter((node_idx[s1] for s1, _ in edge_list), dtype=np.intp, count=len(edge_list))
+        edge_b = np.fromiter((node_idx[s2] for _, s2 in edge_list), dtype=np.intp, count=len(edge_list))
+        D = np.full((len(S_ids), len(S_ids)), np.inf, dtype=np.float32)
+        D[edge_a, edge_b] = np.fromiter((dist_matrix[e] for e in edge_list), dtype=np.float32, count=len(edge_list))
+        edge_km = D[edge_a, edge_b].tolist()
+
+    out_edges, in_edges = defaultdict(list), defaultdict(list)
+    for k, (s1, s2) in enumerate(edge_list):
+        out_edges[s1].append(k)
+        in_edges[s2].append(k)
+
+    return _Network(
+        S_map=S_map,
+        C_unique_map=C_unique_map,
+        S_ids=S_ids,
+        S_set=set(S_ids),
+        stop_ids=stop_ids,
+        C_ids=C_ids,
+        station_to_id=station_to_id,
+        feasible_edges=feasible_edges,
+        edge_list=edge_list,
+        edge_km=edge_km,
+        out_edges=out_edges,
+        in_edges=in_edges
+    )
 
 
 def optimize_network(
@@ -115,164 +450,329 @@ def optimize_network(
     depots: List[Depot],
     active_disruptions: List[DisruptionEvent],
     current_sim_time: float,
-    interval_seconds: int
+    interval_seconds: int,
+    model_cache: Optional["MipModelCache"] = None
 ) -> Dict[str, Any]:
     """
     Enhanced MIP for robust rerouting and charging under disruptions.
+    Pass a MipModelCache to reuse the built model across calls while its structure is unchanged.
     """
     print(f"\n--- Robust MIP Optimization at {time.strftime('%H:%M:%S', time.localtime(current_sim_time))} ---")
     print(f"Active disruptions: {len(active_disruptions)}")
 
-    # 1. Build nodes and feasible edges with disruption awareness
-    S_map, C_unique_map, feasible_edges, depot_ids, disrupted_stop_ids = build_node_maps_and_feasible_edges(
-        routes, charging_stations, depots, active_disruptions
-    )
-    S_ids = list(S_map.keys())
-    C_ids = list(C_unique_map.keys())
+    # 1-2. Nodes, feasible edges and their lengths (reused while the disrupted stops and
+    # operational chargers are unchanged)
+    network_key = (id(routes), id(charging_stations), tuple(id(d) for d in depots),
+                   tuple(station.operational for station in charging_stations),
+                   frozenset(stop_id for d in active_disruptions for stop_id in d.affected_stop_ids))
+    network = model_cache.networks.get(network_key) if model_cache is not None else None
+    if network is None:
+        network = _build_network(routes, charging_stations, depots, active_disruptions)
+        if model_cache is not None:
+            model_cache.store_network(network_key, network)
+    else:
+        print(f"Reusing network with {len(network.edge_list)} edges")
+    S_map, C_unique_map, S_ids, C_ids = network.S_map, network.C_unique_map, network.S_ids, network.C_ids
+    feasible_edges, edge_list, edge_km = network.feasible_edges, network.edge_list, network.edge_km
 
     if not S_ids:
         print("No valid nodes after disruptions. Skipping optimization.")
         return {"decisions": {}}
 
-    # 2. Distance matrix: try cache first, compute once if needed
-    from resilient_efleets.src.optimization.distance_cache import (
-        load_cached_distances, compute_and_cache_distances
+    print(f"Model size: {len(buses)} buses, {len(S_ids)} nodes, {len(feasible_edges)} edges")
+
+    # 3. Time horizon (minute-level discretization), initial positions and reachability
+    horizon_min = SimulationSettings.MIP_HORIZON_MINUTES
+    out_edges, in_edges = network.out_edges, network.in_edges
+    start_nodes = {bus.bus_id: _initial_node(bus, network.S_set, network.station_to_id) for bus in buses}
+    reach = {
+        b: _reachable_nodes(start, S_ids, edge_list, out_edges, horizon_min)
+        for b, start in start_nodes.items()
+    }
+    inputs = MipInputs(
+        buses=buses,
+        S_map=S_map,
+        C_unique_map=C_unique_map,
+        S_ids=S_ids,
+        stop_ids=network.stop_ids,
+        C_ids=C_ids,
+        edge_list=edge_list,
+        edge_km=edge_km,
+        out_edges=out_edges,
+        in_edges=in_edges,
+        start_nodes=start_nodes,
+        reach=reach,
+        horizon_min=horizon_min,
+        unserved_cost=SimulationSettings.MIP_UNSERVED_DEMAND_COST * (2 if active_disruptions else 1)  # higher during disruption
     )
 
-    cached_dist = load_cached_distances(S_map, feasible_edges)
-    if cached_dist is not None:
-        dist_matrix = cached_dist
+    # 4-9. Build (or reuse), solve and extract immediate decisions
+    use_gurobipy = USE_GUROBI and GUROBIPY_AVAILABLE
+    if USE_GUROBI and not GUROBIPY_AVAILABLE:
+        print("gurobipy not available. Falling back to PuLP")
+    key = (tuple(S_ids), frozenset(feasible_edges), tuple(start_nodes.items()), use_gurobipy)
+    model = model_cache.get(key) if model_cache is not None else None
+    if model is None:
+        model = _build_gurobipy(inputs) if use_gurobipy else _build_pulp(inputs)
+        if model_cache is not None:
+            model_cache.store(key, model)
+    else:
+        print("Reusing MIP model (initial SOC, charger capacity and demand cost updated)")
+        model.update(inputs)
+
+    # Warm start from the previous call's solution (keys that still exist); repeat
+    # solves get lighter solver settings unless the previous one ran out of time
+    if model_cache is not None:
+        if model_cache.last_solution:
+            model.warm_start(model_cache.shifted_solution(current_sim_time, horizon_min))
+        model.tune_for_repeat(bool(model_cache.last_solution) and not model_cache.last_timed_out)
+
+    result = model.solve()
+    if model_cache is None:
+        model.dispose()
     else:
-        dist_matrix = compute_and_cache_distances(S_map, feasible_edges)
-    
-    print(f"Using distance matrix with {len(dist_matrix)} entries")
+        model_cache.last_timed_out = result is None or result[2] >= SimulationSettings.MIP_TIME_LIMIT_SECONDS
+        if result is not None:
+            model_cache.last_solution = model.solution()
+            model_cache.last_solution_time = current_sim_time
+    if result is None:
+        return {"decisions": {}}
+    decisions, status, solve_time = result
 
-    print(f"Model size: {len(buses)} buses, {len(S_ids)} nodes, {len(feasible_edges)} edges")
+    return {
+        "decisions": decisions,
+        "S_map": S_map,
+        "C_unique_map": C_unique_map,
+        "status": status,
+        "solve_time": solve_time
+    }
 
-    # 3. Time horizon (minute-level discretization)
-    horizon_min = SimulationSettings.MIP_HORIZON_MINUTES
+
+class MipModelCache:
+    """
+    Keeps the last built MIP across optimize_network calls.
+    The model is reused while its structure (nodes, edges, buses and their start nodes)
+    is unchanged; only initial SOC, charger capacities and the unserved-demand cost are
+    then updated before re-solving. Any structural change rebuilds it.
+    The last solution's binary values seed the next solve as a MIP start, rebuilt or not,
+    shifted by the minutes elapsed since it was found (rolling horizon).
+    Node maps, edges and edge lengths are kept per set of disrupted stops and
+    operational chargers, so the network and its distances are only built once for each.
+    """
+
+    NETWORK_CACHE_SIZE = 16
+
+    def __init__(self):
+        self.key = None
+        self.model = None
+        # Network per (routes, stations, depots, operational flags, disrupted stops): the
+        # key covers everything it depends on, so it survives reset()
+        self.networks: Dict[tuple, _Network] = {}
+        self.last_solution: Dict[tuple, int] = {}  # (var name, *index, minute) -> 0/1
+        self.last_solution_time: Optional[float] = None
+        self.last_timed_out = False
+
+    def shifted_solution(self, current_sim_time: float, horizon_min: int) -> Dict[tuple, int]:
+        """
+        The last solution re-indexed to the horizon starting at current_sim_time: minute t
+        of the new model takes minute t + shift of the old one, where they overlap.
+        With no overlap (shift >= horizon) the solution is used unshifted, as a template.
+        """
+        shift = round((current_sim_time - self.last_solution_time) / 60) if self.last_solution_time is not None else 0
+        if shift <= 0 or shift >= horizon_min:
+            return self.last_solution
+        return {key[:-1] + (key[-1] - shift,): val for key, val in self.last_solution.items() if key[-1] >= shift}
+
+    def store_network(self, key, network: "_Network"):
+        # Bounded: drop the oldest network once NETWORK_CACHE_SIZE are kept
+        if len(self.networks) >= self.NETWORK_CACHE_SIZE:
+            del self.networks[next(iter(self.networks))]
+        self.networks[key] = network
+
+    def get(self, key):
+        return self.model if self.model is not None and key == self.key else None
+
+    def store(self, key, model):
+        # Replaces the model only: the last solution still seeds the rebuilt one
+        if self.model is not None:
+            self.model.dispose()
+        self.key, self.model = key, model
+
+    def reset(self):
+        if self.model is not None:
+            self.model.dispose()
+        self.key = self.model = None
+        self.last_solution = {}
+        self.last_solution_time = None
+        self.last_timed_out = False
+
+
+def _pulp_objective(inputs: MipInputs, soc, served):
+    horizon_min = inputs.horizon_min
+    buses = inputs.buses
+    return (
+        lpSum((1 - served[s]) * inputs.S_map[s].demand for s in served) * inputs.unserved_cost +
+        lpSum((50 - soc[(b.bus_id, t)]) for b in buses for t in range(horizon_min + 1) if t >= horizon_min // 2) * SimulationSettings.MIP_BATTERY_DRAIN_PENALTY * 0.5 +
+        lpSum((100 - soc[(b.bus_id, horizon_min)]) for b in buses) * SimulationSettings.MIP_BATTERY_DRAIN_PENALTY
+    )
+
+
+@dataclass
+class _PulpModel:
+    """PuLP (HiGHS/CBC) model plus handles to the parts that change between calls."""
+    inputs: MipInputs
+    prob: LpProblem
+    x: Dict
+    charge: Dict
+    y: Dict
+    soc: Dict
+    served: Dict
+    soc_start: Dict[str, Any]                # bus_id -> soc[b, 0] == bus.soc
+    capacity: Dict[Tuple[str, int], Any]     # (cs_id, t) -> charge count <= available slots
+    warm_started: bool = False
+
+    def update(self, inputs: MipInputs):
+        for bus in inputs.buses:
+            self.soc_start[bus.bus_id].changeRHS(bus.soc)
+        for (c, t), constraint in self.capacity.items():
+            constraint.changeRHS(inputs.C_unique_map[c].available_slots)
+        self.prob.setObjective(_pulp_objective(inputs, self.soc, self.served))
+
+    def solution(self) -> Dict[tuple, int]:
+        return {
+            (name,) + key: round(var.varValue)
+            for name, variables in (("x", self.x), ("y", self.y), ("charge", self.charge))
+            for key, var in variables.items() if var.varValue is not None
+        }
+
+    def warm_start(self, solution: Dict[tuple, int]):
+        for name, variables in (("x", self.x), ("y", self.y), ("charge", self.charge)):
+            for key, var in variables.items():
+                start = solution.get((name,) + key)
+                if start is None:
+                    var.varValue = None  # cell absent from the last solution: no start value
+                else:
+                    var.setInitialValue(start)
+        self.warm_started = True
+
+    def tune_for_repeat(self, enabled: bool):
+        pass  # The PuLP solvers run with the same options every time
+
+    def solve(self):
+        return _solve_pulp(self)
+
+    def dispose(self):
+        pass
+
+
+def _build_pulp(inputs: MipInputs) -> _PulpModel:
+    """Build the MIP with PuLP (HiGHS/CBC fallback)."""
+    buses, C_unique_map = inputs.buses, inputs.C_unique_map
+    C_ids = inputs.C_ids
+    horizon_min = inputs.horizon_min
     T = list(range(horizon_min + 1))  # t=0 is current minute
 
     # 4. Problem setup
     prob = LpProblem("Robust_Electric_Bus_Optimization", LpMinimize)
 
-    # Variables
-    x = LpVariable.dicts("x", ((b.bus_id, s, t) for b in buses for s in S_ids for t in T), cat=LpBinary)
-    y = LpVariable.dicts("y", ((b.bus_id, s1, s2, t) for b in buses
-                               for s1, s2 in feasible_edges for t in T if t < horizon_min), cat=LpBinary)
-    charge = LpVariable.dicts("charge", ((b.bus_id, c, t) for b in buses
-                                         for c in C_ids for t in T), cat=LpBinary)
+    # Variables, only for (node, minute) cells each bus can reach
+    layout = _var_layout(inputs)
+    x = LpVariable.dicts("x", layout.x_keys, cat=LpBinary)
+    y = LpVariable.dicts("y", layout.y_keys, cat=LpBinary)
+    # Bus at a charger in a cell. Flow conservation makes it x minus binary moves out,
+    # so it is integral without being declared binary; charge_amt <= charge is the
+    # fraction of that minute actually spent charging
+    charge = LpVariable.dicts("charge", layout.ch_keys, lowBound=0, upBound=1, cat=LpContinuous)
+    charge_amt = LpVariable.dicts("charge_amt", layout.ch_keys, lowBound=0, upBound=1, cat=LpContinuous)
     soc = LpVariable.dicts("soc", ((b.bus_id, t) for b in buses for t in T), lowBound=0, upBound=100)
-    
+
     # Improved: binary served per stop
-    served = LpVariable.dicts("served", [s for s in S_ids if isinstance(S_map[s], Stop)], cat=LpBinary)
+    served = LpVariable.dicts("served", inputs.stop_ids, cat=LpBinary)
 
     # 5. Objective – more robust
-    unserved_cost = SimulationSettings.MIP_UNSERVED_DEMAND_COST * (2 if active_disruptions else 1)  # higher during disruption
-    prob += (
-        lpSum((1 - served[s]) * S_map[s].demand for s in served) * unserved_cost +
-        lpSum((50 - soc[(b.bus_id, t)]) for b in buses for t in T if t >= horizon_min // 2) * SimulationSettings.MIP_BATTERY_DRAIN_PENALTY * 0.5 +
-        lpSum((100 - soc[(b.bus_id, horizon_min)]) for b in buses) * SimulationSettings.MIP_BATTERY_DRAIN_PENALTY
-    )
+    prob += _pulp_objective(inputs, soc, served)
 
-    # 6. Constraints
+    # 6. Constraints (cells without a variable are unreachable, i.e. fixed at 0)
+    soc_start = {}
     for bus in buses:
         b = bus.bus_id
 
-        # Initial position
-        current_node = None
-        if bus.status == "on_route" and bus.current_route and bus.current_stop_index > 0:
-            prev_stop = bus.current_route.stops[bus.current_stop_index - 1]
-            if prev_stop and prev_stop.stop_id in S_ids:
-                current_node = prev_stop.stop_id
-        elif bus.status in ["in_depot", "idle", "returning_to_depot"]:
-            current_node = f"Depot_{bus.depot.name}"
-        elif bus.status == "charging" and bus.charging_station:
-            for cs_id, station in C_unique_map.items():
-                if station == bus.charging_station:
-                    current_node = cs_id
-                    break
-
-        if current_node and current_node in S_ids:
+        # Initial position (the start node is the only reachable cell at t=0)
+        current_node = inputs.start_nodes[b]
+        if current_node:
             prob += x[(b, current_node, 0)] == 1
-            for s in S_ids:
-                if s != current_node:
-                    prob += x[(b, s, 0)] == 0
-        prob += soc[(b, 0)] == bus.soc
-
-        # Flow conservation
-        for t in range(horizon_min):
-            for s in S_ids:
-                # Outgoing: move or charge
-                outgoing = lpSum(y.get((b, s, s2, t), 0) for s2 in S_ids if (s, s2) in feasible_edges)
-                charging_here = lpSum(charge[(b, c, t)] for c in C_ids if c == s)
-                prob += outgoing + charging_here == x[(b, s, t)]
-
-                # Incoming at t+1
-                incoming = lpSum(y.get((b, s1, s, t), 0) for s1 in S_ids if (s1, s) in feasible_edges)
-                prob += x[(b, s, t + 1)] == incoming
-
-            # SOC dynamics
-            discharge = lpSum(
-                y.get((b, s1, s2, t), 0) * dist_matrix[(s1, s2)] * 0.1  # 0.1% per km
-                for s1, s2 in feasible_edges
-            )
-            charge_gain = lpSum(
-                charge[(b, c, t)] * C_unique_map[c].capacity_kw
-                for c in C_ids
-            ) * (60 / 3600) / (bus.battery_capacity_kwh / 100)  # per minute
-            prob += soc[(b, t + 1)] == soc[(b, t)] - discharge + charge_gain
-
-        # Prevent visiting disrupted stops
-        for s in disrupted_stop_ids:
-            if s in S_ids:
-                prob += lpSum(x[(b, s, t)] for t in T) == 0
+        soc_start[b] = soc[(b, 0)] == bus.soc
+        prob += soc_start[b]
+
+    # Flow conservation and SOC dynamics, assembled for all buses at once as sparse rows
+    y_vars = [y[key] for key in layout.y_keys]
+    _add_pulp_equalities(prob, _flow_rows(layout, horizon_min),
+                         [x[key] for key in layout.x_keys] + y_vars + [charge[key] for key in layout.ch_keys])
+    _add_pulp_equalities(prob, _soc_dynamics_rows(inputs, layout),
+                         [soc[(b.bus_id, t)] for b in buses for t in T] + y_vars + [charge_amt[key] for key in layout.ch_keys])
+    for key in layout.ch_keys:
+        prob += charge_amt[key] <= charge[key]
 
     # Demand serving (proper binary)
-    BIG_M = 1000
+    visits_by_stop = defaultdict(list)
+    for (_, s, _), var in x.items():
+        visits_by_stop[s].append(var)
     for s in served:
-        visits = lpSum(x[(b.bus_id, s, t)] for b in buses for t in T)
-        prob += visits <= BIG_M * served[s]
+        visits = lpSum(visits_by_stop[s])
+        if visits_by_stop[s]:
+            # Big-M is the number of visit cells, the tightest valid bound
+            prob += visits <= len(visits_by_stop[s]) * served[s]
         prob += visits >= served[s]  # if served=1, at least one visit
 
     # Charging capacity
+    capacity = {}
     for c in C_ids:
         station = C_unique_map[c]
         available = station.available_slots
         for t in T:
-            prob += lpSum(charge[(bb.bus_id, c, t)] for bb in buses) <= available
-
-    # 7. Solver selection
-    if USE_GUROBI:
-        try:
-            solver = GUROBI(
-                msg=1,                    # 1 = show solver log, 0 = silent
-                timeLimit=SimulationSettings.MIP_TIME_LIMIT_SECONDS,
-                gapRel=0.20,              # 20% MIP gap
-                Threads=12,               # Adjust to your CPU cores
-                # Optional extras:
-                # MIPFocus=1,             # 1=feasibility, 2=optimality, 3=improve bound
-                # Heuristics=0.1,         # Spend more time on early heuristics
-                # Presolve=2,             # Aggressive presolve
-                manageEnv=True            # Recommended: Properly releases license after solve
-            )
-            print("Using Gurobi direct interface (gurobipy)")
-        except Exception as e:
-            print(f"Direct Gurobi interface not available: {e}")
-            print("Falling back to CBC")
-            solver = PULP_CBC_CMD(
-                msg=0,
-                timeLimit=SimulationSettings.MIP_TIME_LIMIT_SECONDS,
-                gapRel=0.20,
-                threads=8
-            )
-    else:
-        solver = PULP_CBC_CMD(
-            msg=0,
-            timeLimit=SimulationSettings.MIP_TIME_LIMIT_SECONDS,
-            gapRel=0.20,
-            threads=8
-        )
+            at_station = [charge[(bb.bus_id, c, t)] for bb in buses if (bb.bus_id, c, t) in charge]
+            if at_station:
+                capacity[(c, t)] = lpSum(at_station) <= available
+                prob += capacity[(c, t)]
+
+    return _PulpModel(inputs, prob, x, charge, y, soc, served, soc_start, capacity)
+
+
+def _add_pulp_equalities(prob: LpProblem, csr, columns: list):
+    """Add rows A @ columns == 0 given as CSR arrays, one LpAffineExpression per row."""
+    indptr, indices, data = csr
+    indices, data = indices.tolist(), data.tolist()
+    for lo, hi in zip(indptr[:-1].tolist(), indptr[1:].tolist()):
+        prob += LpAffineExpression([(columns[i], v) for i, v in zip(indices[lo:hi], data[lo:hi])]) == 0
+
+
+@lru_cache(maxsize=None)
+def _highs_available() -> bool:
+    return HiGHS_CMD(msg=0).available()
+
+
+def _pulp_solver(warm_start: bool):
+    """PULP_SOLVER's command (HiGHS, else CBC), with the same time limit, gap and threads."""
+    options = dict(
+        msg=0,
+        timeLimit=SimulationSettings.MIP_TIME_LIMIT_SECONDS,
+        gapRel=0.20,
+        threads=8,
+        warmStart=warm_start
+    )
+    if PULP_SOLVER == "highs":
+        if _highs_available():
+            return HiGHS_CMD(**options)
+        print("HiGHS not available. Falling back to CBC")
+    return PULP_CBC_CMD(**options)
+
+
+def _solve_pulp(model: _PulpModel):
+    """Solve with PuLP (HiGHS or CBC). Returns (decisions, status, solve_time), or None if no solution."""
+    prob, charge, y = model.prob, model.charge, model.y
+
+    # 7. Solver
+    solver = _pulp_solver(model.warm_started)
 
     # 8. Solve
     start_time = time.time()
@@ -286,39 +786,188 @@ def optimize_network(
 
     if prob.status not in [1, -1]:  # Not Optimal or Feasible
         print("No feasible solution found.")
-        return {"decisions": {}}
+        return None
 
     # 9. Extract immediate decisions (t=0 charge or t=0→t=1 move)
-    decisions = {}
+    decisions = _immediate_decisions(model.inputs, charge, y, lambda var: var.varValue or 0)
+    return decisions, status, solve_time
+
+
+def _gurobipy_objective(inputs: MipInputs, soc, served):
+    horizon_min = inputs.horizon_min
+    bus_ids = [b.bus_id for b in inputs.buses]
+    penalty = SimulationSettings.MIP_BATTERY_DRAIN_PENALTY
+    return (
+        gp.quicksum((1 - served[s]) * inputs.S_map[s].demand for s in served.keys()) * inputs.unserved_cost +
+        gp.quicksum(50 - soc[b, t] for b in bus_ids for t in range(horizon_min + 1) if t >= horizon_min // 2) * penalty * 0.5 +
+        gp.quicksum(100 - soc[b, horizon_min] for b in bus_ids) * penalty
+    )
+
+
+@dataclass
+class _GurobiModel:
+    """gurobipy model (with its own environment) plus the variables and constraints updated between calls."""
+    inputs: MipInputs
+    env: Any
+    m: Any
+    x: Any
+    charge: Any
+    y: Any
+    soc: Any
+    served: Any
+    capacity: Any  # tupledict (cs_id, t) -> charge count <= available slots
+
+    def update(self, inputs: MipInputs):
+        for bus in inputs.buses:
+            self.soc[bus.bus_id, 0].LB = self.soc[bus.bus_id, 0].UB = bus.soc
+        for (c, t), constraint in self.capacity.items():
+            constraint.RHS = inputs.C_unique_map[c].available_slots
+        self.m.setObjective(_gurobipy_objective(inputs, self.soc, self.served), GRB.MINIMIZE)
+
+    def solution(self) -> Dict[tuple, int]:
+        return {
+            (name,) + key: round(val)
+            for name, variables in (("x", self.x), ("y", self.y), ("charge", self.charge))
+            for key, val in self.m.getAttr("X", variables).items()
+        }
+
+    def warm_start(self, solution: Dict[tuple, int]):
+        for name, variables in (("x", self.x), ("y", self.y), ("charge", self.charge)):
+            for key, var in variables.items():
+                var.Start = solution.get((name,) + key, GRB.UNDEFINED)
+
+    def tune_for_repeat(self, enabled: bool):
+        for name, val in GUROBI_REPEAT_PARAMS.items():
+            self.m.setParam(name, val if enabled else self.m.getParamInfo(name)[-1])  # last field: default
+
+    def solve(self):
+        return _solve_gurobipy(self)
+
+    def dispose(self):
+        self.m.dispose()
+        self.env.dispose()
+
+
+def _build_gurobipy(inputs: MipInputs) -> _GurobiModel:
+    """
+    Build the MIP directly in gurobipy: variables come from addVars (tupledicts)
+    and constraints from addConstrs, so no Python object is created per variable.
+    """
+    buses, C_unique_map = inputs.buses, inputs.C_unique_map
+    C_ids, reach = inputs.C_ids, inputs.reach
+    horizon_min = inputs.horizon_min
+    T = list(range(horizon_min + 1))  # t=0 is current minute
+    moves = range(horizon_min)
+    bus_ids = [b.bus_id for b in buses]
+    stop_ids = inputs.stop_ids
+
+    env = gp.Env(params={"OutputFlag": 1})
+    m = gp.Model("Robust_Electric_Bus_Optimization", env=env)
+
+    # Variables, only for (node, minute) cells each bus can reach
+    layout = _var_layout(inputs)
+    x = m.addVars(layout.x_keys, vtype=GRB.BINARY, name="x")
+    y = m.addVars(layout.y_keys, vtype=GRB.BINARY, name="y")
+    # At-charger indicator: integral through flow conservation, so continuous (see _build_pulp)
+    charge = m.addVars(layout.ch_keys, lb=0, ub=1, name="charge")
+    charge_amt = m.addVars(layout.ch_keys, lb=0, ub=1, name="charge_amt")
+    soc = m.addVars(bus_ids, T, lb=0, ub=100, name="soc")
+    served = m.addVars(stop_ids, vtype=GRB.BINARY, name="served")
+
+    # Objective
+    m.setObjective(_gurobipy_objective(inputs, soc, served), GRB.MINIMIZE)
+
+    # Initial position as variable bounds (the start node is the only reachable cell at t=0), initial SOC
     for bus in buses:
         b = bus.bus_id
-        decision = None
+        current_node = inputs.start_nodes[b]
+        if current_node:
+            x[b, current_node, 0].LB = 1
+        soc[b, 0].LB = soc[b, 0].UB = bus.soc
+
+    # Flow conservation over reachable cells (outgoing moves + charging here == presence,
+    # presence at t+1 == incoming) and SOC dynamics: each block is one sparse matrix
+    # call when scipy is available
+    y_vars = [y[key] for key in layout.y_keys]
+    if sp is not None:
+        _add_sparse_equalities(m, _flow_rows(layout, horizon_min),
+                               [x[key] for key in layout.x_keys] + y_vars + [charge[key] for key in layout.ch_keys], "flow")
+    else:
+        m.addConstrs(
+            (y.sum(b, s, "*", t) + (charge[b, s, t] if (b, s, t) in charge else 0) == x[b, s, t]
+             for b in bus_ids for t in moves for s in reach[b][t]),
+            name="flow_out"
+        )
+        m.addConstrs(
+            (x[b, s, t + 1] == y.sum(b, "*", s, t) for b in bus_ids for t in moves for s in reach[b][t + 1]),
+            name="flow_in"
+        )
+    _add_sparse_equalities(m, _soc_dynamics_rows(inputs, layout),
+                           [soc[b, t] for b in bus_ids for t in T] + y_vars + [charge_amt[key] for key in layout.ch_keys], "soc")
+    m.addConstrs((charge_amt[key] <= charge[key] for key in layout.ch_keys), name="charge_amt_ub")
 
-        # Charging now?
-        for c in C_ids:
-            if value(charge.get((b, c, 0), 0)) == 1:
-                decision = {"action": "charge", "station_id": c}
-                break
+    # Demand serving: no visits unless served, as indicator constraints (no big-M)
+    m.addConstrs(((served[s] == 0) >> (x.sum("*", s, "*") == 0) for s in stop_ids), name="served_ub")
+    m.addConstrs((x.sum("*", s, "*") >= served[s] for s in stop_ids), name="served_lb")
 
-        # Moving next?
-        if not decision:
-            for s1, s2 in feasible_edges:
-                if value(y.get((b, s1, s2, 0), 0)) == 1:
-                    if s2.startswith("Depot_"):
-                        decision = {"action": "return_depot", "target": s2}
-                    elif s2.startswith("CS_"):
-                        decision = {"action": "charge", "station_id": s2}
-                    else:
-                        decision = {"action": "move", "target_node_id": s2}
-                    break
+    # Charging capacity
+    capacity = m.addConstrs(
+        (charge.sum("*", c, t) <= C_unique_map[c].available_slots for c in C_ids for t in T),
+        name="cs_capacity"
+    )
 
-        if decision:
-            decisions[b] = decision
+    # Solver parameters
+    m.Params.TimeLimit = SimulationSettings.MIP_TIME_LIMIT_SECONDS
+    m.Params.MIPGap = 0.20
+    m.Params.Threads = 12  # Adjust to your CPU cores
+    for name, val in GUROBI_PARAMS.items():
+        m.setParam(name, val)
+    m.Params.NoRelHeurTime = GUROBI_NO_REL_HEUR_FRACTION * SimulationSettings.MIP_TIME_LIMIT_SECONDS
+    if SimulationSettings.MIP_CONCURRENT_SOLVES > 1:
+        # Gurobi splits the threads over independent solves with different seeds and
+        # strategies and stops when the first one meets the gap
+        m.Params.ConcurrentMIP = SimulationSettings.MIP_CONCURRENT_SOLVES
+
+    return _GurobiModel(inputs, env, m, x, charge, y, soc, served, capacity)
+
+
+def _add_sparse_equalities(m, csr, columns: list, name: str):
+    """Add rows A @ columns == 0 given as CSR arrays: one addMConstr with scipy, else one LinExpr per row."""
+    indptr, indices, data = csr
+    n_rows = len(indptr) - 1
+    if sp is not None:
+        A = sp.csr_matrix((data, indices, indptr), shape=(n_rows, len(columns)))
+        m.addMConstr(A, columns, "=", np.zeros(n_rows), name=name)
+        return
+    for r in range(n_rows):
+        lo, hi = indptr[r], indptr[r + 1]
+        m.addConstr(gp.LinExpr(data[lo:hi].tolist(), [columns[i] for i in indices[lo:hi]]) == 0, name=f"{name}[{r}]")
+
+
+def _solve_gurobipy(model: _GurobiModel):
+    """Solve with Gurobi. Returns (decisions, status, solve_time), or None if no solution."""
+    m, charge, y = model.m, model.charge, model.y
+
+    print("Using Gurobi direct interface (gurobipy)")
+    start_time = time.time()
+    m.optimize()
+    solve_time = time.time() - start_time
 
-    return {
-        "decisions": decisions,
-        "S_map": S_map,
-        "C_unique_map": C_unique_map,
-        "status": status,
-        "solve_time": solve_time
-    }
\ No newline at end of file
+    if m.Status == GRB.OPTIMAL:
+        status = "Optimal"
+    elif m.SolCount > 0:
+        status = "Feasible"
+    elif m.Status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD):
+        status = "Infeasible"
+    else:
+        status = "Not Solved"
+    obj_str = f"{m.ObjVal:.1f}" if m.SolCount > 0 else "n/a"
+    print(f"MIP Status: {status} | Solve time: {solve_time:.2f}s | Objective: {obj_str}")
+
+    if m.SolCount == 0:
+        print("No feasible solution found.")
+        return None
+
+    # Extract immediate decisions (t=0 charge or t=0→t=1 move)
+    decisions = _immediate_decisions(model.inputs, charge, y, lambda var: var.X)
+    return decisions, status, solve_time
@@ -5,16 +5,21 @@ Orchestrates: hazards → optimization → decision application → bus steps 
 """
 
 import time
+import random
+import warnings
+import numpy as np
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 
 from resilient_efleets.src.simulation.state import SimulationState
 from resilient_efleets.src.simulation.logger import SimulationLogger
+from resilient_efleets.src.simulation.event_log import event_log
+from resilient_efleets.src.fleet.fleet import BusFleet
+from resilient_efleets.src.core.charging import StationAvailability
 from resilient_efleets.src.simulation.event_queue import HybridSimulationScheduler, SimulationEvent, EventType
 from resilient_efleets.src.hazards.manager import DisruptionManager
-from resilient_efleets.src.hazards.flood import FloodHazardConfig
-from resilient_efleets.src.optimization.mip_model import optimize_network
+from resilient_efleets.src.hazards.flood import FloodHazardConfig, compute_aoi_bounds
+from resilient_efleets.src.optimization.mip_model import optimize_network, MipModelCache
 from resilient_efleets.src.optimization.decision_applier import apply_mip_decisions
 from resilient_efleets.src.config.settings import SimulationSettings, HybridSimulationSettings
 
@@ -40,40 +45,159 @@ class SimulationEngine:
         self.logger = logger or SimulationLogger()
         self.state.disruption_manager = DisruptionManager(
             flood_config=flood_config,
-            use_random_disruptions=use_random_disruptions
+            use_random_disruptions=use_random_disruptions,
+            aoi_bounds=compute_aoi_bounds(state.stops, state.charging_stations, state.depots)
         )
-        self.mip_interval_steps = 10  # Run MIP every 10 steps for better performance (for fixed interval mode)
-        self.parallel_bus_workers = 8  # Use 8 cores for parallel bus steps (reduced to avoid overhead)
+        self.mip_reoptimize_seconds = SimulationSettings.MIP_REOPTIMIZE_SECONDS  # Fixed interval: MIP at least this often
         self.use_mip = True  # Enable MIP optimization for coordinated fleet decisions
+        self.mip_model_cache = MipModelCache()  # Reused while the MIP's structure is unchanged
+        self._last_mip_key = None     # _mip_state_key() of the last optimization
+        self._last_mip_result = None  # ...and its result, reapplied while that key holds
+        self._last_mip_time: Optional[float] = None  # Fixed interval: sim time of the last MIP run
+        self._urgent_at_mip = frozenset()  # ...and the buses below CRITICAL_SOC_PERCENT then
+        self._trips_at_mip = 0  # ...and the number of trips dispatched by then
+        self._station_map = {}
+        self._station_map_version = None  # (station list, its length) the map was built from
+        self._fleet: Optional[BusFleet] = None
+        # Per-tick batched traffic delays; seeded from `random` so random.seed() still reproduces a run
+        self._rng = np.random.default_rng(random.getrandbits(64))
         
         # Simulation mode: 'fixed_interval' or 'hybrid_adaptive'
         self.simulation_mode = HybridSimulationSettings.SIMULATION_MODE
         self.hybrid_scheduler: Optional[HybridSimulationScheduler] = None
 
     def _build_event_list(self) -> list:
-        """Extract all scheduled events from bus schedules"""
-        events = []
+        """
+        Extract all scheduled events from bus schedules, sorted by time.
+        Times are collected into an array and ordered with a stable NumPy argsort
+        (same order as a stable sort on time); events are only created in that order.
+        """
+        times = []
+        sources = []  # (bus_id, trip_idx, trip), one per trip
         for bus in self.state.buses:
             for trip_idx, trip in enumerate(bus.daily_schedule):
-                # Trip start event
-                events.append(SimulationEvent(
-                    time=trip['start_time'],
-                    event_type=EventType.TRIP_START,
-                    bus_id=bus.bus_id,
-                    data={'trip_idx': trip_idx, 'trip': trip}
-                ))
-                # Trip end event
-                events.append(SimulationEvent(
-                    time=trip['end_time'],
-                    event_type=EventType.TRIP_END,
-                    bus_id=bus.bus_id,
-                    data={'trip_idx': trip_idx, 'trip': trip}
-                ))
-        
-        # Sort by time
-        events.sort(key=lambda e: e.time)
+                times.append(trip['start_time'])  # Trip start event at 2*i
+                times.append(trip['end_time'])    # Trip end event at 2*i + 1
+                sources.append((bus.bus_id, trip_idx, trip))
+
+        order = np.argsort(np.asarray(times, dtype=np.float64), kind='stable')
+        events = []
+        for k in order.tolist():
+            bus_id, trip_idx, trip = sources[k >> 1]
+            events.append(SimulationEvent(
+                time=times[k],
+                event_type=EventType.TRIP_END if k & 1 else EventType.TRIP_START,
+                bus_id=bus_id,
+                data={'trip_idx': trip_idx, 'trip': trip}
+            ))
         return events
 
+    def _current_station_map(self) -> dict:
+        """CS_{name}_{i} -> station, rebuilt only when the charging station list changes."""
+        stations = self.state.charging_stations
+        version = self._station_map_version
+        if version is None or version[0] is not stations or version[1] != len(stations):
+            self._station_map = {f"CS_{s.name}_{i}": s for i, s in enumerate(stations)}
+            self._station_map_version = (stations, len(stations))
+        return self._station_map
+
+    def _current_fleet(self) -> BusFleet:
+        """Array view of state.buses, rebuilt only when the bus list changes."""
+        buses = self.state.buses
+        if self._fleet is None or self._fleet.buses is not buses or len(self._fleet.soc) != len(buses):
+            self._fleet = BusFleet(buses)
+        return self._fleet
+
+    def _mip_state_key(self) -> tuple:
+        """
+        Summary of the state the MIP decides on: active disruptions, charger slots and,
+        per bus, status, route and trip, position and SOC bucket. Equal keys mean no
+        meaningful change.
+        """
+        fleet = self._current_fleet().sync()
+        soc_bucket = SimulationSettings.MIP_STATE_SOC_BUCKET_PERCENT
+        return (
+            frozenset((d.route_id, tuple(d.affected_stop_ids), d.start_time, d.end_time)
+                      for d in self.state.active_disruptions),
+            tuple(station.available_slots for station in self.state.charging_stations),
+            fleet.status.tobytes(),
+            fleet.stop_index.tobytes(),
+            (fleet.soc // soc_bucket).astype(np.int64).tobytes(),
+            tuple(id(bus.charging_station) for bus in fleet.buses),
+            # A redispatched bus can start a new trip with the same status and stop index
+            tuple((bus.current_route.route_id if bus.current_route else None, bus.current_trip_index)
+                  for bus in fleet.buses),
+        )
+
+    def _optimize(self, current_sim_time: float, interval_seconds: int) -> dict:
+        """
+        Run optimize_network on the current state, or return the previous result
+        when the state has not changed meaningfully since (see _mip_state_key).
+        """
+        key = self._mip_state_key()
+        if self._last_mip_result is not None and key == self._last_mip_key:
+            print("[MIP] State unchanged since last optimization, reusing its decisions")
+            return self._last_mip_result
+
+        mip_result = optimize_network(
+            buses=self.state.buses,
+            routes=self.state.routes,
+            charging_stations=self.state.charging_stations,
+            depots=list(self.state.depots.values()),
+            active_disruptions=self.state.active_disruptions,
+            current_sim_time=current_sim_time,
+            interval_seconds=interval_seconds,
+            model_cache=self.mip_model_cache
+        )
+        self._last_mip_key, self._last_mip_result = key, mip_result
+        return mip_result
+
+    @property
+    def mip_interval_steps(self) -> int:
+        """Deprecated: mip_reoptimize_seconds in FIXED_STEP_SECONDS steps."""
+        return max(round(self.mip_reoptimize_seconds / HybridSimulationSettings.FIXED_STEP_SECONDS), 1)
+
+    @mip_interval_steps.setter
+    def mip_interval_steps(self, steps: int):
+        warnings.warn("mip_interval_steps is deprecated; set mip_reoptimize_seconds instead",
+                      DeprecationWarning, stacklevel=2)
+        self.mip_reoptimize_seconds = steps * HybridSimulationSettings.FIXED_STEP_SECONDS
+
+    def _mip_triggered(self, current_sim_time: float) -> bool:
+        """
+        Whether the fixed-interval loop should re-run the MIP now: on the first step,
+        once mip_reoptimize_seconds have passed since the last run, when the disrupted
+        stops or flooded stations changed, when a bus started a trip, or when a bus
+        newly dropped below CRITICAL_SOC_PERCENT. Otherwise buses keep executing the
+        previous decisions.
+        """
+        urgent = frozenset(
+            bus.bus_id for bus in self.state.buses if bus.soc < SimulationSettings.CRITICAL_SOC_PERCENT
+        )
+        # Trip indices only grow during a run, so a larger sum means a dispatch since the last MIP
+        trips = sum(bus.current_trip_index for bus in self.state.buses)
+        triggered = (
+            self._last_mip_time is None
+            or current_sim_time - self._last_mip_time >= self.mip_reoptimize_seconds
+            or self.state.disruption_manager.changed
+            or trips != self._trips_at_mip
+            or not urgent <= self._urgent_at_mip
+        )
+        if triggered:
+            self._last_mip_time, self._urgent_at_mip, self._trips_at_mip = current_sim_time, urgent, trips
+        return triggered
+
+    def _step_buses(self, context: dict):
+        """
+        Advance every bus agent by one tick, in fleet order.
+        Serial on purpose: bus.step is pure Python (holds the GIL) and buses share
+        charging-station slots, so a thread pool only added futures overhead.
+        The numeric part of the on-route moves is batched up front by the fleet.
+        """
+        self._current_fleet().plan_moves(self._rng)
+        for bus in self.state.buses:
+            bus.step(context)
+
     def _run_fixed_interval(self, sim_start: float, sim_end: float, step_seconds: int):
         """Run simulation with fixed timesteps (original approach)"""
         current_sim_time = sim_start
@@ -87,7 +211,7 @@ class SimulationEngine:
 
         while current_sim_time < sim_end:
             step_count += 1
-            print(f"\n--- Step {step_count} | Time: {datetime.fromtimestamp(current_sim_time).strftime('%H:%M:%S')} ---")
+            event_log.log(current_sim_time, "step", None, step_count)
 
             # 1. Update hazards
             self.state.charging_stations = self.state.disruption_manager.update(
@@ -100,44 +224,36 @@ class SimulationEngine:
             )
             self.state.active_disruptions = self.state.disruption_manager.get_active_disruptions()
 
-            # 2. Centralized optimization (run periodically for performance)
-            if self.use_mip and step_count % self.mip_interval_steps == 1:
+            # 2. Centralized optimization (periodically, or earlier on a triggering event)
+            if self.use_mip and self._mip_triggered(current_sim_time):
                 print(f"[MIP] Running optimization at step {step_count}...")
-                mip_result = optimize_network(
-                    buses=self.state.buses,
-                    routes=self.state.routes,
-                    charging_stations=self.state.charging_stations,
-                    depots=list(self.state.depots.values()),
-                    active_disruptions=self.state.active_disruptions,
-                    current_sim_time=current_sim_time,
-                    interval_seconds=step_seconds
-                )
+                mip_result = self._optimize(current_sim_time, step_seconds)
 
                 # 3. Apply MIP decisions
                 apply_mip_decisions(
                     buses=self.state.buses,
                     mip_result=mip_result,
                     charging_stations=self.state.charging_stations,
-                    current_sim_time=current_sim_time
+                    current_sim_time=current_sim_time,
+                    buses_by_id=self.state.buses_by_id
                 )
             else:
                 if self.use_mip:
-                    print(f"[MIP] Skipping optimization (using previous decisions)...")
+                    event_log.log(current_sim_time, "mip_skipped", None, "")
                 else:
-                    print(f"[MIP] DISABLED - buses using autonomous agent behavior")
+                    event_log.log(current_sim_time, "mip_disabled")
 
-            # 4. Bus agent steps (PARALLELIZED)
+            # 4. Bus agent steps
             context = {
                 "current_sim_time": current_sim_time,
                 "stations": self.state.charging_stations,
+                "station_availability": StationAvailability(self.state.charging_stations),
                 "disruptions": self.state.active_disruptions,
-                "station_map": {f"CS_{s.name}_{i}": s for i, s in enumerate(self.state.charging_stations)}
+                "disruption_pairs": self.state.disruption_manager.get_active_pairs(),
+                "station_map": self._current_station_map()
             }
 
-            with ThreadPoolExecutor(max_workers=self.parallel_bus_workers) as executor:
-                futures = [executor.submit(bus.step, context) for bus in self.state.buses]
-                for future in as_completed(futures):
-                    future.result()
+            self._step_buses(context)
 
             # 5. Log
             self.logger.log_step(current_sim_time, self.state)
@@ -189,7 +305,7 @@ class SimulationEngine:
                 break
 
             step_count += 1
-            print(f"--- Step {step_count:4d} | Time: {datetime.fromtimestamp(current_sim_time).strftime('%H:%M:%S')} | Type: {step_type:12s} ---")
+            event_log.log(current_sim_time, "step_typed", None, step_count, step_type)
 
             # 1. Update hazards
             self.state.charging_stations = self.state.disruption_manager.update(
@@ -207,37 +323,30 @@ class SimulationEngine:
                 mip_call_count += 1
                 print(f"  [MIP] Running optimization (batch #{mip_call_count}) with {len(self.hybrid_scheduler.current_batch)} events...")
                 
-                mip_result = optimize_network(
-                    buses=self.state.buses,
-                    routes=self.state.routes,
-                    charging_stations=self.state.charging_stations,
-                    depots=list(self.state.depots.values()),
-                    active_disruptions=self.state.active_disruptions,
-                    current_sim_time=current_sim_time,
-                    interval_seconds=HybridSimulationSettings.FINE_STEP_SECONDS  # Use fine step as interval
-                )
+                # Fine step as interval
+                mip_result = self._optimize(current_sim_time, HybridSimulationSettings.FINE_STEP_SECONDS)
 
                 apply_mip_decisions(
                     buses=self.state.buses,
                     mip_result=mip_result,
                     charging_stations=self.state.charging_stations,
-                    current_sim_time=current_sim_time
+                    current_sim_time=current_sim_time,
+                    buses_by_id=self.state.buses_by_id
                 )
             else:
-                print(f"  [MIP] Skipping optimization (using previous decisions)...")
+                event_log.log(current_sim_time, "mip_skipped", None, "  ")
 
             # 3. Bus agent steps
             context = {
                 "current_sim_time": current_sim_time,
                 "stations": self.state.charging_stations,
+                "station_availability": StationAvailability(self.state.charging_stations),
                 "disruptions": self.state.active_disruptions,
-                "station_map": {f"CS_{s.name}_{i}": s for i, s in enumerate(self.state.charging_stations)}
+                "disruption_pairs": self.state.disruption_manager.get_active_pairs(),
+                "station_map": self._current_station_map()
             }
 
-            with ThreadPoolExecutor(max_workers=self.parallel_bus_workers) as executor:
-                futures = [executor.submit(bus.step, context) for bus in self.state.buses]
-                for future in as_completed(futures):
-                    future.result()
+            self._step_buses(context)
 
             # 4. Log
             self.logger.log_step(current_sim_time, self.state)
@@ -263,25 +372,32 @@ class SimulationEngine:
             step_seconds: Timestep size for fixed_interval mode (uses config default if None)
             mode: 'fixed_interval' or 'hybrid_adaptive' (uses config if None)
         """
-        # Determine simulation time window from schedules
-        all_start_times = []
-        for bus in self.state.buses:
-            for trip in bus.daily_schedule:
-                all_start_times.append(trip["start_time"])
-
-        if not all_start_times:
+        # Determine simulation time window from schedules (one pass, nothing materialized)
+        first_start = min(
+            (trip["start_time"] for bus in self.state.buses for trip in bus.daily_schedule),
+            default=None
+        )
+        if first_start is None:
             print("No scheduled trips found.")
             return
 
-        sim_start = min(all_start_times) - 300  # 5 min buffer
+        sim_start = first_start - 300  # 5 min buffer
         sim_end = sim_start + duration_hours * 3600
 
         # Use provided parameters or fall back to config
         simulation_mode = mode or HybridSimulationSettings.SIMULATION_MODE
         fixed_step = step_seconds or HybridSimulationSettings.FIXED_STEP_SECONDS
+        self.state.index_buses()  # The bus list may have been edited since the state was built
 
         # Run appropriate simulation mode
-        if simulation_mode == "hybrid_adaptive":
-            self._run_hybrid_adaptive(sim_start, sim_end)
-        else:  # default to fixed_interval
-            self._run_fixed_interval(sim_start, sim_end, fixed_step)
\ No newline at end of file
+        try:
+            if simulation_mode == "hybrid_adaptive":
+                self._run_hybrid_adaptive(sim_start, sim_end)
+            else:  # default to fixed_interval
+                self._run_fixed_interval(sim_start, sim_end, fixed_step)
+        finally:
+            self.mip_model_cache.reset()  # Each run starts from a freshly built model
+            self._last_mip_key = self._last_mip_result = None
+            self._last_mip_time, self._urgent_at_mip, self._trips_at_mip = None, frozenset(), 0
+            self.logger.flush()  # Log file complete on disk once run() returns
+            event_log.flush()  # Agent messages buffered during the run
\ No newline at end of file
@@ -0,0 +1,77 @@
+# src/simulation/event_log.py
+"""
+Deferred log of agent and per-step engine messages from the simulation hot path.
+Records are plain (sim_time, code, bus_id, args) tuples in a bounded ring buffer;
+text is only formatted on flush(), or immediately when SimulationSettings.VERBOSE.
+"""
+
+import sys
+from collections import deque
+from datetime import datetime
+from typing import Deque, Optional, TextIO, Tuple
+
+from resilient_efleets.src.config.settings import SimulationSettings
+
+# Message code -> format ({ts}: sim time, {bus}: bus id, {0}, {1}...: args)
+MESSAGES = {
+    "charge_start": "[{ts}] {bus} started charging at {0}",
+    "charge_end": "[{ts}] {bus} finished charging",
+    "stranded": "[{ts}] {bus} stranded - cannot reach depot",
+    "returned": "[{ts}] {bus} returned to depot",
+    "dispatched": "[{ts}] {bus} dispatched on {0}",
+    "skip_stop": "{bus} skipping disrupted stop {0}",
+    "arrived": "[{ts}] {bus} arrived at {0}, SoC={1:.1f}%",
+    "active_disruptions": "[{ts:%H:%M:%S}] Active disruptions: {0}",
+    "step": "\n--- Step {0} | Time: {ts:%H:%M:%S} ---",
+    "step_typed": "--- Step {0:4d} | Time: {ts:%H:%M:%S} | Type: {1:12s} ---",
+    "mip_skipped": "{0}[MIP] Skipping optimization (using previous decisions)...",
+    "mip_disabled": "[MIP] DISABLED - buses using autonomous agent behavior",
+    "mip_decisions": "MIP decisions: {0}",
+}
+
+
+class EventLog:
+    def __init__(self, capacity: int = SimulationSettings.EVENT_LOG_CAPACITY):
+        # Oldest records are dropped once capacity is reached; dropped counts them until the next flush
+        self.records: Deque[Tuple[float, str, Optional[str], tuple]] = deque(maxlen=capacity)
+        self.dropped = 0
+        self._last_time: Optional[float] = None
+        self._last_datetime: Optional[datetime] = None
+
+    def log(self, sim_time: float, code: str, bus_id: Optional[str] = None, *args) -> None:
+        """Record one message (printed right away in verbose mode)"""
+        if SimulationSettings.VERBOSE:
+            print(self.format(sim_time, code, bus_id, args))
+        else:
+            if len(self.records) == self.records.maxlen:
+                self.dropped += 1
+            self.records.append((sim_time, code, bus_id, args))
+
+    def format(self, sim_time: float, code: str, bus_id: Optional[str], args: tuple) -> str:
+        """Text of one record; the datetime is converted once per distinct sim time"""
+        if sim_time != self._last_time:
+            self._last_time, self._last_datetime = sim_time, datetime.fromtimestamp(sim_time)
+        return MESSAGES[code].format(*args, ts=self._last_datetime, bus=bus_id)
+
+    def flush(self, file: TextIO = None) -> int:
+        """Write the buffered messages in order and empty the buffer; returns how many"""
+        file = file or sys.stdout
+        if self.dropped:
+            file.write(f"... {self.dropped} earlier messages dropped (buffer capacity {self.records.maxlen})\n")
+            self.dropped = 0
+        n = len(self.records)
+        if n:
+            file.write("\n".join(self.format(t, code, bus_id, args) for t, code, bus_id, args in self.records) + "\n")
+            self.records.clear()
+        return n
+
+    def clear(self) -> None:
+        self.records.clear()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+# Shared by all agents of the process
+event_log = EventLog()
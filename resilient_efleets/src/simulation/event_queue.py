@@ -3,12 +3,16 @@ Event Queue for hybrid event-driven simulation.
 Supports batching of nearby events and adaptive timestep scheduling.
 """
 
+from collections import Counter
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 import heapq
+from bisect import bisect_right
 from datetime import datetime
 
+import numpy as np
+
 
 class EventType(Enum):
     """Types of events in the simulation"""
@@ -19,20 +23,22 @@ class EventType(Enum):
     DISRUPTION_END = "disruption_end"
 
 
-@dataclass
+@dataclass(slots=True)
 class SimulationEvent:
     """Represents a discrete event in the simulation"""
     time: float  # epoch timestamp
     event_type: EventType
     bus_id: str
     data: dict = field(default_factory=dict)  # Extra context (trip, station, etc.)
+    # (time, bus_id), built once: heap comparisons are a single tuple compare
+    sort_key: Tuple[float, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.sort_key = (self.time, self.bus_id)
 
     def __lt__(self, other: "SimulationEvent") -> bool:
-        """For heap ordering (min-heap by time)"""
-        if self.time != other.time:
-            return self.time < other.time
-        # Tiebreaker: sort by bus_id for determinism
-        return self.bus_id < other.bus_id
+        """For heap ordering (min-heap by time, tiebreaker bus_id for determinism)"""
+        return self.sort_key < other.sort_key
 
     def __repr__(self) -> str:
         return f"Event(t={self.time}, type={self.event_type.value}, bus={self.bus_id})"
@@ -113,6 +119,10 @@ class EventQueue:
         return f"EventQueue(size={len(self.queue)}, batch_threshold={self.batch_threshold}s)"
 
 
+# Events of every fine/coarse schedule entry: one shared immutable empty sequence
+NO_EVENTS: Tuple[SimulationEvent, ...] = ()
+
+
 class HybridSimulationScheduler:
     """
     Adaptive scheduler that mixes event-driven and time-stepped simulation.
@@ -155,10 +165,9 @@ class HybridSimulationScheduler:
         self.coarse_step = coarse_step
         self.gap_threshold = gap_threshold
 
-        self.event_queue = EventQueue(batch_threshold)
-        self.schedule: List[Tuple[float, str, List[SimulationEvent]]] = []
+        self.schedule: List[Tuple[float, str, Sequence[SimulationEvent]]] = []
         self.schedule_index = 0
-        self.current_batch: List[SimulationEvent] = []
+        self.current_batch: Sequence[SimulationEvent] = NO_EVENTS
 
     def init_events(
         self,
@@ -168,47 +177,103 @@ class HybridSimulationScheduler:
     ) -> None:
         """
         Initialize the scheduler with events and build the full schedule.
-        
+
+        Events are ordered once by (time, bus_id). Batches are found by bisecting the
+        sorted times, and the fine/coarse steps of every gap between batches are laid
+        out in one vectorized pass; the Python loop only stitches them together per batch.
+
         Args:
-            events: List of SimulationEvent objects (should be sorted by time)
+            events: List of SimulationEvent objects (any order)
             sim_start: Simulation start time
             sim_end: Simulation end time
         """
-        self.event_queue.clear()
-        self.event_queue.add_events(events)
         self.schedule.clear()
         self.schedule_index = 0
 
-        current_time = sim_start
+        times = np.fromiter((e.time for e in events), dtype=np.float64, count=len(events))
+        if events:
+            order = np.lexsort((np.array([e.bus_id for e in events], dtype=str), times))
+            times = times[order]
+            events = [events[i] for i in order.tolist()]
+
+        # Each batch starts at the earliest remaining event and takes all events within batch_threshold of it
+        time_list = times.tolist()
+        starts, ends = [], []
+        i = 0
+        while i < len(time_list):
+            starts.append(i)
+            i = bisect_right(time_list, time_list[i] + self.batch_threshold)
+            ends.append(i)
+        first_times = times[starts]
+        batch_times = times[np.array(ends, dtype=np.intp) - 1]
+
+        # Steps from sim_start / each batch towards the next batch; gap k ends at step_ends[k]
+        prev_times = np.concatenate(([sim_start], batch_times))[:len(starts)]
+        step_times, step_types, step_ends = self._gap_steps(prev_times, first_times, sim_end)
+        past_end = np.flatnonzero(step_times >= sim_end)
+        last_step = int(past_end[0]) if len(past_end) else len(step_times)
+        step_times, step_ends = step_times.tolist(), step_ends.tolist()
 
-        while current_time < sim_end and not self.event_queue.is_empty():
-            next_event_time = self.event_queue.peek_next_time()
-
-            if next_event_time <= current_time + 1:
-                # Process batch of events at current time
-                batch = self.event_queue.get_next_batch()
-                batch_time = batch[-1].time
-                self.schedule.append((batch_time, "batch", batch))
-                current_time = batch_time
-            else:
-                # Decide timestep size based on gap
-                gap = next_event_time - current_time
-                if gap > self.gap_threshold:
-                    step = self.coarse_step
-                    step_type = "coarse_step"
-                else:
-                    step = self.fine_step
-                    step_type = "fine_step"
-
-                next_time = min(current_time + step, next_event_time, sim_end)
-                self.schedule.append((next_time, step_type, []))
-                current_time = next_time
+        current_time = sim_start
+        s = 0
+        for k in range(len(starts)):
+            if current_time >= sim_end:
+                break
+            cut = min(step_ends[k], last_step + 1)
+            if cut > s:
+                self.schedule.extend((t, st, NO_EVENTS) for t, st in zip(step_times[s:cut], step_types[s:cut]))
+                current_time = step_times[cut - 1]
+                if current_time >= sim_end:
+                    break
+            s = step_ends[k]
+
+            self.schedule.append((time_list[ends[k] - 1], "batch", events[starts[k]:ends[k]]))
+            current_time = time_list[ends[k] - 1]
 
         # Finish remaining time with coarse steps
-        while current_time < sim_end:
-            next_time = min(current_time + self.coarse_step, sim_end)
-            self.schedule.append((next_time, "coarse_step", []))
-            current_time = next_time
+        if current_time < sim_end:
+            n = int(np.ceil((sim_end - current_time) / self.coarse_step))
+            fill_times = np.minimum(current_time + self.coarse_step * np.arange(1, n + 1), sim_end)
+            self.schedule.extend((t, "coarse_step", NO_EVENTS) for t in fill_times.tolist())
+
+    def _gap_steps(self, prev_times: np.ndarray, next_times: np.ndarray, sim_end: float):
+        """
+        Steps across each gap prev_times[k] -> next_times[k]: coarse while the remaining
+        gap exceeds gap_threshold, then fine until within 1 s of the event, every step
+        capped at the event and at sim_end.
+        Returns (step times, step types, end offset of each gap's steps).
+        """
+        def count(start, step, span, still_far):
+            # ceil(span / step) steps from start, corrected for rounding against still_far itself
+            n = np.maximum(np.ceil(span / step), 0).astype(np.int64) if step > 0 else np.zeros(len(start), np.int64)
+            while True:
+                fewer = (n > 0) & ~still_far(start + step * (n - 1))
+                more = still_far(start + step * n) if step > 0 else np.zeros(len(n), bool)
+                if not (fewer.any() or more.any()):
+                    return n
+                n = n - fewer + more
+
+        gap = next_times - prev_times
+        n_coarse = count(
+            prev_times, self.coarse_step, np.minimum(gap - self.gap_threshold, gap - 1),
+            lambda t: (next_times - t > self.gap_threshold) & (next_times > t + 1)
+        )
+        fine_start = np.minimum(prev_times + self.coarse_step * n_coarse, next_times)
+        n_fine = count(fine_start, self.fine_step, next_times - fine_start - 1, lambda t: next_times > t + 1)
+
+        n_steps = n_coarse + n_fine
+        step_ends = np.cumsum(n_steps)
+        gap_of = np.repeat(np.arange(len(n_steps)), n_steps)
+        r = np.arange(int(step_ends[-1]) if len(step_ends) else 0) - (step_ends - n_steps)[gap_of]  # position in gap
+        coarse = r < n_coarse[gap_of]
+        step_times = np.where(
+            coarse,
+            prev_times[gap_of] + self.coarse_step * (r + 1),
+            fine_start[gap_of] + self.fine_step * (r - n_coarse[gap_of] + 1)
+        )
+        step_times = np.minimum(np.minimum(step_times, next_times[gap_of]), sim_end)
+        step_types = ["coarse_step" if c else "fine_step" for c in coarse.tolist()]
+        return step_times, step_types, step_ends
 
     def get_steps(self) -> List[Tuple[float, str]]:
         """
@@ -235,22 +300,20 @@ class HybridSimulationScheduler:
     def reset(self) -> None:
         """Reset schedule iterator to beginning"""
         self.schedule_index = 0
-        self.current_batch = []
+        self.current_batch = NO_EVENTS
 
     def stats(self) -> dict:
         """Return statistics about the generated schedule"""
         if not self.schedule:
             return {"steps": 0, "batches": 0, "fine_steps": 0, "coarse_steps": 0}
 
-        batch_count = sum(1 for _, st, _ in self.schedule if st == "batch")
-        fine_count = sum(1 for _, st, _ in self.schedule if st == "fine_step")
-        coarse_count = sum(1 for _, st, _ in self.schedule if st == "coarse_step")
+        counts = Counter(st for _, st, _ in self.schedule)
 
         return {
             "total_steps": len(self.schedule),
-            "batches": batch_count,
-            "fine_steps": fine_count,
-            "coarse_steps": coarse_count,
+            "batches": counts["batch"],
+            "fine_steps": counts["fine_step"],
+            "coarse_steps": counts["coarse_step"],
             "batch_threshold": self.batch_threshold,
             "fine_step_size": self.fine_step,
             "coarse_step_size": self.coarse_step,
@@ -32,33 +32,50 @@ class SimulationLogger:
             "active_disruptions"
         ]
 
-        # Write header
-        with open(self.log_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writeheader()
+        # Kept open for the whole simulation with a large buffer; rows are written
+        # positionally in fieldnames order. flush()/close() push them to disk.
+        self._file = open(self.log_path, "w", newline="", buffering=1 << 20)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.fieldnames)
 
     def log_step(self, sim_time: float, state: SimulationState):
-        disruption_desc = "; ".join(
-            [f"{d.route_id}:{','.join(d.affected_stop_ids)}" for d in state.active_disruptions]
-        ) or "None"
+        # Time strings and disruption summary are the same for every bus in a step
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sim_time_str = datetime.fromtimestamp(sim_time).strftime("%H:%M:%S")
+        disruption_desc = "None"
+        if state.active_disruptions:
+            disruption_desc = "; ".join(
+                [f"{d.route_id}:{','.join(d.affected_stop_ids)}" for d in state.active_disruptions]
+            )
 
-        with open(self.log_path, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            for bus in state.buses:
-                route_name = bus.current_route.name if bus.current_route else "None"
-                cs_name = bus.charging_station.name if bus.charging_station else "None"
-                writer.writerow({
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "sim_time": datetime.fromtimestamp(sim_time).strftime("%H:%M:%S"),
-                    "bus_id": bus.bus_id,
-                    "status": bus.status,
-                    "latitude": bus.current_location.lat,
-                    "longitude": bus.current_location.lon,
-                    "soc": round(bus.soc, 2),
-                    "delay_seconds": round(bus.delay_seconds, 1),
-                    "unserved_demand": round(bus.unserved_demand, 2),
-                    "current_route": route_name,
-                    "current_stop_index": bus.current_stop_index,
-                    "charging_station": cs_name,
-                    "active_disruptions": disruption_desc
-                })
\ No newline at end of file
+        self._writer.writerows(
+            (
+                timestamp,
+                sim_time_str,
+                bus.bus_id,
+                str(bus.status),  # BusStatus -> "on_route" etc.
+                bus.current_location.lat,
+                bus.current_location.lon,
+                round(bus.soc, 2),
+                round(bus.delay_seconds, 1),
+                round(bus.unserved_demand, 2),
+                bus.current_route.name if bus.current_route else "None",
+                bus.current_stop_index,
+                bus.charging_station.name if bus.charging_station else "None",
+                disruption_desc
+            )
+            for bus in state.buses
+        )
+
+    def flush(self):
+        """Write buffered rows to the log file."""
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __del__(self):
+        if hasattr(self, "_file"):
+            self.close()
@@ -22,11 +22,19 @@ class SimulationState:
     charging_stations: List[ChargingStation]
     depots: Dict[str, Depot]                    # name → Depot
     buses: List[Bus] = field(default_factory=list)
+    buses_by_id: Dict[str, Bus] = field(default_factory=dict, repr=False)  # bus_id → Bus, see index_buses()
 
     # Will be initialized later
     disruption_manager: DisruptionManager = None
     active_disruptions: List[DisruptionEvent] = field(default_factory=list)
 
+    def __post_init__(self):
+        self.index_buses()
+
+    def index_buses(self):
+        """Rebuild buses_by_id; call after replacing or adding to buses"""
+        self.buses_by_id = {bus.bus_id: bus for bus in self.buses}
+
     def update_charging_stations(self, updated_stations: List[ChargingStation]):
         """Called by hazard manager when flood disables stations"""
         self.charging_stations = updated_stations
\ No newline at end of file